@@ -19,8 +19,12 @@ rolling window.
 
 from __future__ import annotations
 
+import random
+import threading
 import time
-from typing import Any, Dict, Optional
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
 import httpx
 import time
 import json
@@ -31,6 +35,30 @@ from app.core.config import get_settings
 # outbound HTTP requests at DEBUG level with sensitive headers
 # stripped.  See ``app/logging_config.py`` for details.
 from app.logging_config import log_http_request, logger
+from app.utils.cache import cache
+
+# Seconds that slow-changing catalogue responses (stock areas, product
+# lookups) stay in the shared cache.
+CATALOG_TTL = 300.0
+
+# Upper bound (seconds) for a single retry delay.
+MAX_BACKOFF = 30.0
+
+# Absolute ``time.monotonic()`` deadline shared by every outbound call made
+# while serving the current incoming request.  Set by the request
+# middleware when ``APP_HTTP_REQUEST_BUDGET`` is enabled; ``None`` means
+# no end-to-end budget.
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """Raised when the end-to-end request budget is exhausted."""
+
+
+@lru_cache(maxsize=1024)
+def _host(url: str) -> str:
+    """Return the host of ``url``; parsed once per distinct URL."""
+    return httpx.URL(url).host
 
 
 class CircuitBreaker:
@@ -39,36 +67,47 @@ class CircuitBreaker:
     Tracks consecutive failures for each host and trips the breaker
     when the count exceeds a threshold. The breaker resets after a
     cooldown period. This implementation is intentionally simple and
-    does not use external dependencies.
+    does not use external dependencies. State changes are guarded by a
+    single lock because the breaker is shared by every worker thread.
     """
 
+    __slots__ = ("failure_threshold", "reset_timeout", "_failures", "_tripped_until", "_lock")
+
     def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0) -> None:
         self.failure_threshold = failure_threshold
         self.reset_timeout = reset_timeout
         self._failures: Dict[str, int] = {}
         self._tripped_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
 
     def record_failure(self, host: str) -> None:
-        self._failures[host] = self._failures.get(host, 0) + 1
-        if self._failures[host] >= self.failure_threshold:
-            # trip breaker
-            self._tripped_until[host] = time.time() + self.reset_timeout
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.failure_threshold:
+                # trip breaker
+                self._tripped_until[host] = time.time() + self.reset_timeout
 
     def record_success(self, host: str) -> None:
         # reset failure count on success
-        self._failures.pop(host, None)
-        self._tripped_until.pop(host, None)
+        with self._lock:
+            self._failures.pop(host, None)
+            self._tripped_until.pop(host, None)
 
     def can_request(self, host: str) -> bool:
         until = self._tripped_until.get(host)
         if until is None:
             return True
-        if time.time() >= until:
-            # reset breaker after cooldown
-            self._tripped_until.pop(host, None)
-            self._failures.pop(host, None)
-            return True
-        return False
+        with self._lock:
+            until = self._tripped_until.get(host)
+            if until is None:
+                return True
+            if time.time() >= until:
+                # reset breaker after cooldown
+                self._tripped_until.pop(host, None)
+                self._failures.pop(host, None)
+                return True
+            return False
 
 
 class HTTPClient:
@@ -80,103 +119,205 @@ class HTTPClient:
     event and passed to services via dependency injection.
     """
 
+    __slots__ = (
+        "timeout",
+        "_client",
+        "_breaker",
+        "_host_concurrency",
+        "_host_sems",
+        "_host_sem_lock",
+        "max_retries",
+        "backoff_factor",
+    )
+
     def __init__(self) -> None:
         settings = get_settings()
-        self.timeout = settings.http_timeout
-        # HTTPX Client uses connection pooling
-        self._client = httpx.Client(timeout=self.timeout)
+        # connect/pool share the short timeout; read/write the long one
+        self.timeout = httpx.Timeout(
+            connect=settings.http_connect_timeout,
+            read=settings.http_read_timeout,
+            write=settings.http_read_timeout,
+            pool=settings.http_connect_timeout,
+        )
+        # HTTPX Client uses connection pooling; HTTP/2 lets paginated GETs
+        # against the same Tecopos host share a single warm TLS connection.
+        self._client = httpx.Client(
+            timeout=self.timeout,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive,
+                keepalive_expiry=30.0,
+            ),
+        )
         self._breaker = CircuitBreaker()
+        # Bulkhead: caps in-flight requests per host so a single burst
+        # cannot monopolise the pool or overload one Tecopos host.
+        self._host_concurrency = settings.http_host_concurrency
+        self._host_sems: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_sem_lock = threading.Lock()
         self.max_retries = settings.http_max_retries
         self.backoff_factor = settings.http_backoff_factor
 
+    def _host_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        sem = self._host_sems.get(host)
+        if sem is None:
+            with self._host_sem_lock:
+                sem = self._host_sems.setdefault(host, threading.BoundedSemaphore(self._host_concurrency))
+        return sem
+
+    def _timeout_for(self, deadline: Optional[float]) -> Optional[httpx.Timeout]:
+        """Clamp the configured timeouts to what is left of ``deadline``."""
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("Request deadline exceeded")
+        return httpx.Timeout(
+            connect=min(self.timeout.connect, remaining),
+            read=min(self.timeout.read, remaining),
+            write=min(self.timeout.write, remaining),
+            pool=min(self.timeout.pool, remaining),
+        )
+
     def close(self) -> None:
         """Close the underlying HTTPX client and release resources."""
         self._client.close()
 
-    def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+    def warmup(self, urls: Iterable[str]) -> None:
+        """Open pooled connections to ``urls`` ahead of the first real call.
+
+        Sends a ``HEAD`` to each URL in parallel so the TCP/TLS handshake
+        (and HTTP/2 negotiation) is already done when a user logs in.
+        Best effort: failures are logged and never reach the breaker.
+        """
+        def _head(url: str) -> None:
+            try:
+                self._client.head(url, timeout=self.timeout)
+            except Exception as exc:  # e.g. client closed during shutdown
+                logger.info(json.dumps({"event": "http_warmup_failed", "url": url, "detalle": str(exc)}))
+
+        threads = [threading.Thread(target=_head, args=(url,), daemon=True) for url in urls]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def _request(self, method: str, url: str, deadline: Optional[float] = None, **kwargs: Any) -> httpx.Response:
         """Perform a single HTTP request without retries.
 
         If the circuit breaker for the target host is tripped, a
         ``RuntimeError`` is raised immediately. This error should be
         handled by callers to prevent unhandled exceptions from
-        propagating to FastAPI.
+        propagating to FastAPI. ``deadline`` (absolute monotonic time,
+        defaulting to :data:`request_deadline`) caps the timeouts.
         """
-        host = httpx.URL(url).host
+        if deadline is None:
+            deadline = request_deadline.get()
+        if "timeout" not in kwargs:
+            timeout = self._timeout_for(deadline)
+            if timeout is not None:
+                kwargs["timeout"] = timeout
+        host = _host(url)
         # Log outbound request at debug level.  We remove sensitive
         # headers (Authorization and x-app-businessid) in
         # ``log_http_request``.  Params or JSON payload are passed if
         # present.  We do not record tokens.
+        method_u = method.upper()
         headers_for_log = kwargs.get("headers") or {}
         params_for_log = kwargs.get("params")
         json_body_for_log = kwargs.get("json")
-        log_http_request(method.upper(), url, headers=headers_for_log, params=params_for_log, json_body=json_body_for_log)
-        start_ts = time.time()
+        log_http_request(method_u, url, headers=headers_for_log, params=params_for_log, json_body=json_body_for_log)
+        start_ts = time.perf_counter()
         if not self._breaker.can_request(host):
             raise RuntimeError(f"Circuit breaker open for host {host}")
         try:
-            response = self._client.request(method, url, **kwargs)
+            with self._host_semaphore(host):
+                response = self._client.request(method_u, url, **kwargs)
         except Exception as exc:
             # network or other error
             self._breaker.record_failure(host)
             # log exception as error with stack trace
             logger.error(json.dumps({
                 "event": "http_error",
-                "method": method.upper(),
+                "method": method_u,
                 "url": url,
                 "detail": str(exc),
             }), exc_info=True)
             raise
         finally:
             # Always log the end of the HTTP request with status and duration
-            duration_ms = (time.time() - start_ts) * 1000
+            duration_ms = (time.perf_counter() - start_ts) * 1000
             status = None
             try:
                 status = response.status_code  # type: ignore[assignment]
             except Exception:
                 status = None
-            log_http_request(method.upper(), url, headers=headers_for_log, params=params_for_log, json_body=json_body_for_log, status=status, duration_ms=duration_ms)
-        # record failures or reset circuit breaker based on status
-        if response.is_error:
-            # mark failure for 5xx errors only; 4xx considered client error
-            if 500 <= response.status_code < 600:
-                self._breaker.record_failure(host)
-            else:
-                # reset on successful or 4xx (not server) to avoid blocking
-                self._breaker.record_success(host)
-        else:
+            log_http_request(method_u, url, headers=headers_for_log, params=params_for_log, json_body=json_body_for_log, status=status, duration_ms=duration_ms)
+        # record failures or reset circuit breaker based on status.
+        # 4xx are client errors: they say nothing about host health, so the
+        # breaker is left untouched.
+        status_code = response.status_code
+        if status_code >= 500:
+            self._breaker.record_failure(host)
+        elif status_code < 400:
             self._breaker.record_success(host)
         return response
 
-    def get(self, url: str, **kwargs: Any) -> httpx.Response:
+    def get(self, url: str, deadline: Optional[float] = None, **kwargs: Any) -> httpx.Response:
         """Perform a GET request with retries and exponential backoff.
 
         Only GET requests are retried as they are idempotent. Other
         methods delegate to :meth:`_request` and propagate errors.
+        Retries stop once ``deadline`` has passed.
         """
+        if deadline is None:
+            deadline = request_deadline.get()
         last_exc: Optional[Exception] = None
         for attempt in range(self.max_retries + 1):
             try:
-                return self._request("GET", url, **kwargs)
+                return self._request("GET", url, deadline=deadline, **kwargs)
+            except DeadlineExceeded:
+                raise
             except Exception as exc:
                 last_exc = exc
                 # don't retry on non‑connection errors for GET
                 if attempt >= self.max_retries:
                     break
-                # exponential backoff
-                delay = self.backoff_factor * (2 ** attempt)
+                # exponential backoff with full jitter so concurrent
+                # workers do not retry in lockstep
+                delay = random.uniform(0, min(self.backoff_factor * (2 ** attempt), MAX_BACKOFF))
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    break
                 time.sleep(delay)
         # if we reach here, all attempts failed
         if last_exc:
             raise last_exc
         raise RuntimeError("GET request failed but no exception captured")
 
-    def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+    def request(self, method: str, url: str, *, deadline: Optional[float] = None, **kwargs: Any) -> httpx.Response:
         """Public request method.
 
         For GET requests this applies retry logic. For other methods
-        the request is performed once.
+        the request is performed once. ``deadline`` is an absolute
+        ``time.monotonic()`` value; when omitted the per-request
+        :data:`request_deadline` (if any) applies.
         """
         method_upper = method.upper()
         if method_upper == "GET":
-            return self.get(url, **kwargs)
-        return self._request(method_upper, url, **kwargs)
\ No newline at end of file
+            return self.get(url, deadline=deadline, **kwargs)
+        return self._request(method_upper, url, deadline=deadline, **kwargs)
+
+    def get_cached(self, url: str, *, cache_key: Any, ttl: float = CATALOG_TTL, **kwargs: Any) -> httpx.Response:
+        """GET ``url`` through the shared TTL cache (cache-aside).
+
+        ``cache_key`` should identify the business the data belongs to
+        (e.g. ``("stock_areas", region, business_id)``). Only 200 responses
+        are stored; concurrent misses on one key share a single request.
+        """
+        return cache.get_or_set(
+            cache_key,
+            lambda: self.get(url, **kwargs),
+            ttl,
+            cache_if=lambda resp: resp.status_code == 200,
+        )
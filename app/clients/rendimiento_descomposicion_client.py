@@ -1,57 +1,130 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Generator, List, Optional, Tuple
+from typing import Any, ClassVar, Dict, Generator, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from fastapi import HTTPException
 
-from app.core.http_sync import teco_request
+from app.core.config import get_settings
+from app.core.http_sync import teco_get_coalesced, teco_json, teco_request
 from app.utils import get_base_url, get_auth_headers
+from app.utils.cache import TTLCache
 
+import re
 import unicodedata
 
+# Máximo de páginas de movimientos que se piden en paralelo
+_PREFETCH_CONCURRENCY = 10
 
+_WS_RE = re.compile(r"\s+")
 
+# Acentos habituales en español → letra base (str.translate corre en C)
+_ACCENT_MAP = str.maketrans("áéíóúüñàèìòùÁÉÍÓÚÜÑÀÈÌÒÙ", "aeiouunaeiouAEIOUUNAEIOU")
+
+
+@lru_cache(maxsize=4096)
 def _norm(s: str) -> str:
     # lower + sin acentos + espacios colapsados
     if not s:
         return ""
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    s = " ".join(s.lower().split())
-    return s
+    s = s.translate(_ACCENT_MAP)
+    if not s.isascii():
+        # otros diacríticos / formas compuestas: ruta lenta NFKD
+        s = unicodedata.normalize("NFKD", s)
+        s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return _WS_RE.sub(" ", s.casefold()).strip()
+
+
+def _page_items(data: Any) -> List[Dict[str, Any]]:
+    # Tecopos devuelve una lista o un dict con "items"; se normaliza aquí
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return data.get("items") or []
+    return []
 
 class RendimientoDescomposicionClient:
+    # base_url de backends que no aceptan paginación por cursor
+    _cursor_unsupported: ClassVar[Set[str]] = set()
+
     def __init__(self, *, region: str, token: str, business_id: int):
         self.region = region
         self.token = token
         self.business_id = business_id
         self.base_url = get_base_url(region)
         self.headers = get_auth_headers(token, business_id, region)
+        # Topes de paginación: acotan el trabajo ante un backend que no termina
+        settings = get_settings()
+        self._max_pages = settings.max_pages
+        self._max_items = settings.max_items
 
-    def list_stock_areas(self) -> List[Dict[str, Any]]:
+    def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None, *, coalesce: bool = False) -> Any:
+        if coalesce:
+            resp = teco_get_coalesced(url, headers=self.headers, params=params)
+        else:
+            resp = teco_request("GET", url, headers=self.headers, params=params)
+        if not (200 <= resp.status_code < 300):
+            raise HTTPException(status_code=resp.status_code, detail=resp.text)
+        return teco_json(resp)
+
+    def _check_limits(self, page: int, yielded: int) -> None:
+        """
+        Llamar al recibir una página con datos. Si ya se entregaron
+        ``max_pages`` páginas o ``max_items`` ítems quedan datos que no se
+        van a leer: se corta con 502 en lugar de devolver un resultado
+        truncado que parezca completo (los KPIs se suman sobre estas páginas).
+        """
+        if page > self._max_pages or yielded >= self._max_items:
+            raise HTTPException(
+                status_code=502,
+                detail=(
+                    f"Tecopos devolvió más datos que el límite de paginación "
+                    f"({self._max_pages} páginas / {self._max_items} ítems); el resultado estaría incompleto"
+                ),
+            )
+
+    def iter_stock_areas_pages(self) -> Generator[List[Dict[str, Any]], None, None]:
+        """Itera las áreas STOCK página a página como ``{"id", "name"}``."""
         page = 1
-        out: List[Dict[str, Any]] = []
+        count = 0
         url = f"{self.base_url}/api/v1/administration/area"
         while True:
-            resp = teco_request("GET", url, headers=self.headers, params={"page": page, "type": "STOCK"})
-            if not (200 <= resp.status_code < 300):
-                raise HTTPException(status_code=resp.status_code, detail=resp.text)
-            data = resp.json()
-            items = data if isinstance(data, list) else data.get("items") or []
+            items = _page_items(self._get_json(url, {"page": page, "type": "STOCK"}, coalesce=True))
             if not items:
                 break
-            for it in items:
-                out.append({"id": it.get("id"), "name": it.get("name")})
+            self._check_limits(page, count)
+            yield [{"id": it.get("id"), "name": it.get("name")} for it in items]
+            count += len(items)
             page += 1
+
+    def list_stock_areas(self) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        for page_areas in self.iter_stock_areas_pages():
+            out.extend(page_areas)
         return out
 
     # NUEVO: candidatos por nombre (exacto/startswith/contains)
     def find_area_candidates(self, area_name: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
         target = _norm(area_name)
-        areas = self.list_stock_areas()
-        normed = [({"id": a["id"], "name": a["name"], "_n": _norm(a["name"])}) for a in areas]
+
+        # una sola pasada por página: exacto / empieza por / contiene.
+        # Con un exacto no hace falta pedir más páginas.
+        exact: List[Dict[str, Any]] = []
+        starts: List[Dict[str, Any]] = []
+        contains: List[Dict[str, Any]] = []
+        for page_areas in self.iter_stock_areas_pages():
+            for a in page_areas:
+                n = _norm(a["name"])
+                if n == target:
+                    exact.append(a)
+                elif n.startswith(target):
+                    starts.append(a)
+                elif target and target in n:
+                    contains.append(a)
+            if exact:
+                break
 
         # 1) exacto normalizado
-        exact = [a for a in normed if a["_n"] == target]
         if exact:
             # match único si hay 1 exacto
             if len(exact) == 1:
@@ -61,11 +134,7 @@ class RendimientoDescomposicionClient:
             cands = [{"id": a["id"], "label": a["name"]} for a in exact]
             return None, cands
 
-        # 2) empieza por
-        starts = [a for a in normed if a["_n"].startswith(target)]
-        # 3) contiene
-        contains = [a for a in normed if target and target in a["_n"]]
-
+        # 2) empieza por  3) contiene
         # dedup conservando prioridad (startswith > contains)
         seen = set()
         ranked: List[Dict[str, Any]] = []
@@ -93,31 +162,124 @@ class RendimientoDescomposicionClient:
         area_id: int,
         date_from: str,
         date_to: str,
+        cursor_param: Optional[str] = None,
+        cursor_field: str = "id",
     ) -> Generator[List[Dict[str, Any]], None, None]:
-        page = 1
-        df = (date_from or "")[:10]
-        dt = (date_to or "")[:10]
-        base_params = {
+        """
+        Itera páginas de movimientos padre OUT/DESCOMPOSITION.
+
+        Por defecto pagina con ``?page=N``. Si se indica ``cursor_param``
+        (p.ej. ``"after"``) se pagina por cursor usando ``cursor_field`` del
+        último ítem, lo que mantiene constante el coste por página en el
+        servidor. Si el backend rechaza o ignora el cursor se recuerda por
+        ``base_url`` y se continúa por número de página.
+        """
+        url, base_params = self._movement_query(area_id, date_from, date_to)
+
+        if cursor_param and self.base_url not in self._cursor_unsupported:
+            resume = yield from self._iter_movements_by_cursor(url, base_params, cursor_param, cursor_field)
+            if resume is None:
+                return
+            page, yielded = resume
+        else:
+            # Página 1 en serie: si trae totalPages, el resto se pide en paralelo
+            data = self._get_json(url, {**base_params, "page": 1})
+            items = _page_items(data)
+            if not items:
+                return
+            yield items
+            yielded = len(items)
+
+            # _page_items admite una página como lista suelta: sin totalPages
+            total_pages = data.get("totalPages") if isinstance(data, dict) else None
+            if isinstance(total_pages, int):
+                if total_pages <= 1:
+                    return
+                # el total ya dice si se pasa del tope: no pedir páginas de más
+                self._check_limits(total_pages, yielded)
+                executor = ThreadPoolExecutor(max_workers=min(_PREFETCH_CONCURRENCY, total_pages - 1))
+                try:
+                    futures = [
+                        executor.submit(self._get_json, url, {**base_params, "page": p})
+                        for p in range(2, total_pages + 1)
+                    ]
+                    # se consumen en orden para conservar el orden de páginas
+                    for p, fut in enumerate(futures, start=2):
+                        items = _page_items(fut.result())
+                        if not items:
+                            break
+                        self._check_limits(p, yielded)
+                        yield items
+                        yielded += len(items)
+                finally:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                return
+            page = 2
+
+        # Sin totalPages: paginación secuencial hasta página vacía.
+        # Un único dict de params; solo cambia la clave "page".
+        params = dict(base_params)
+        while True:
+            params["page"] = page
+            items = _page_items(self._get_json(url, params))
+            if not items:
+                break
+            self._check_limits(page, yielded)
+            yield items
+            yielded += len(items)
+            page += 1
+
+    def _movement_query(self, area_id: int, date_from: str, date_to: str) -> Tuple[str, Dict[str, Any]]:
+        params = {
             "areaId": area_id,
             "all_data": True,
-            "dateFrom": df,
-            "dateTo": dt,
+            "dateFrom": (date_from or "")[:10],
+            "dateTo": (date_to or "")[:10],
             "operation": "OUT",
             "category": "DESCOMPOSITION",
         }
-        url = f"{self.base_url}/api/v1/administration/movement"
+        return f"{self.base_url}/api/v1/administration/movement", params
+
+    def _iter_movements_by_cursor(
+        self,
+        url: str,
+        base_params: Dict[str, Any],
+        cursor_param: str,
+        cursor_field: str,
+    ) -> Generator[List[Dict[str, Any]], None, Optional[Tuple[int, int]]]:
+        """
+        Paginación por cursor. Devuelve ``None`` si terminó, o
+        ``(pagina_siguiente, items_entregados)`` para continuar por número
+        de página cuando el backend no soporta el cursor.
+        """
+        params = dict(base_params)
+        page = 0
+        yielded = 0
+        prev_first: Any = None
         while True:
-            params = dict(base_params); params["page"] = page
+            page += 1
             resp = teco_request("GET", url, headers=self.headers, params=params)
+            if resp.status_code == 400 and cursor_param in params:
+                self._cursor_unsupported.add(self.base_url)
+                return page, yielded
             if not (200 <= resp.status_code < 300):
                 raise HTTPException(status_code=resp.status_code, detail=resp.text)
-            data = resp.json()
-            items = data.get("items") if isinstance(data, dict) else None
+            items = _page_items(teco_json(resp))
             if not items:
-                break
+                return None
+            first = items[0].get(cursor_field)
+            if cursor_param in params and first == prev_first:
+                # el backend ignora el cursor y repite la primera página
+                self._cursor_unsupported.add(self.base_url)
+                return page, yielded
+            prev_first = first
+            self._check_limits(page, yielded)
             yield items
-            page += 1
-
+            yielded += len(items)
+            cursor = items[-1].get(cursor_field)
+            if cursor is None:
+                return None
+            params[cursor_param] = cursor
 
     # --------------------------
     # DETALLE MOVIMIENTO
@@ -127,7 +289,20 @@ class RendimientoDescomposicionClient:
         GET /api/v1/administration/movement/{movementId}
         """
         url = f"{self.base_url}/api/v1/administration/movement/{movement_id}"
-        resp = teco_request("GET", url, headers=self.headers)
-        if not (200 <= resp.status_code < 300):
-            raise HTTPException(status_code=resp.status_code, detail=resp.text)
-        return resp.json()
+        return self._get_json(url, coalesce=True)
+
+
+# Instancias reutilizadas por credenciales: base_url y headers no cambian
+# tras __init__, así que compartirlas entre solicitudes es seguro.
+_CLIENT_CACHE = TTLCache(maxsize=1024)
+_CLIENT_TTL = 300.0
+
+
+def get_rendimiento_client(*, region: str, token: str, business_id: int) -> RendimientoDescomposicionClient:
+    """Devuelve un cliente cacheado para (region, business_id, token)."""
+    key = (region, business_id, token)
+    client = _CLIENT_CACHE.get(key)
+    if client is None:
+        client = RendimientoDescomposicionClient(region=region, token=token, business_id=business_id)
+        _CLIENT_CACHE.set(key, client, _CLIENT_TTL)
+    return client
@@ -13,10 +13,28 @@ application. Use these functions in services when making requests.
 
 from __future__ import annotations
 
-from typing import Dict
+import sys
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Mapping
 from fastapi import HTTPException
 
 
+# Region → domain tables. ``api0``..``api4`` follow the ``api{n}`` pattern,
+# except ``api1`` which is served from the bare ``api``/``admin`` domains.
+_BASE_URLS: Dict[str, str] = {
+    **{f"api{i}": f"https://api{i}.tecopos.com" for i in range(5)},
+    "api1": "https://api.tecopos.com",
+    "apidev": "https://apidev.tecopos.com",
+}
+
+_ORIGIN_URLS: Dict[str, str] = {
+    **{f"api{i}": "https://admin.tecopos.com" for i in range(5)},
+    "apidev": "https://admindev.tecopos.com",
+}
+
+
+@lru_cache(maxsize=32)
 def get_origin_url(region: str) -> str:
     """Return the web origin for a given Tecopos region.
 
@@ -28,17 +46,13 @@ def get_origin_url(region: str) -> str:
     :raises HTTPException: if the region is not supported
     :return: the origin URL (without trailing slash)
     """
-    region = region.lower().strip()
-    if region == "apidev":
-        return "https://admindev.tecopos.com"
-    if region == "api1":
-        return "https://admin.tecopos.com"
-    # api0 – api4 map to the same admin domain
-    if region in [f"api{i}" for i in range(5)] or region == "api0":
-        return "https://admin.tecopos.com"
-    raise HTTPException(status_code=400, detail="Región inválida")
+    try:
+        return _ORIGIN_URLS[region.lower().strip()]
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Región inválida")
 
 
+@lru_cache(maxsize=32)
 def get_base_url(region: str) -> str:
     """Return the API base URL for a given Tecopos region.
 
@@ -51,18 +65,61 @@ def get_base_url(region: str) -> str:
     :raises HTTPException: if the region is invalid
     :return: the base API URL
     """
-    region = region.lower().strip()
-    if region == "apidev":
-        return "https://apidev.tecopos.com"
-    if region == "api1":
-        return "https://api.tecopos.com"
-    # handle api0..api4
-    if region in [f"api{i}" for i in range(5)] or region == "api0":
-        return f"https://{region}.tecopos.com"
-    raise HTTPException(status_code=400, detail="Región inválida")
-
-
-def build_auth_headers(token: str, business_id: int, region: str) -> Dict[str, str]:
+    try:
+        return _BASE_URLS[region.lower().strip()]
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Región inválida")
+
+
+def all_base_urls() -> tuple[str, ...]:
+    """Return every distinct Tecopos API base URL (used to pre-warm connections)."""
+    return tuple(dict.fromkeys(_BASE_URLS.values()))
+
+
+# Constant (non-secret) headers per region, built once at import. The
+# read-only views guarantee no caller can alter the shared template.
+_HEADERS_TEMPLATE: Dict[str, Mapping[str, str]] = {
+    sys.intern(region): MappingProxyType({
+        "Content-Type": "application/json",
+        "Accept": "*/*",
+        "Origin": origin,
+        "Referer": f"{origin}/",
+        "x-app-origin": "Tecopos-Admin",
+        "User-Agent": "Mozilla/5.0",
+    })
+    for region, origin in _ORIGIN_URLS.items()
+}
+
+
+def _header_template(region: str) -> Mapping[str, str]:
+    template = _HEADERS_TEMPLATE.get(region)
+    if template is None:
+        template = _HEADERS_TEMPLATE.get(region.lower().strip())
+        if template is None:
+            raise HTTPException(status_code=400, detail="Región inválida")
+    return template
+
+
+def build_base_headers(region: str) -> Dict[str, str]:
+    """Return a fresh copy of the unauthenticated headers for ``region``.
+
+    Used for the login call, before a token or business ID exist.
+    """
+    return dict(_header_template(region))
+
+
+@lru_cache(maxsize=256)
+def _auth_headers(token: str, business_id: str, region: str) -> Mapping[str, str]:
+    # only the per-user values are formatted; the rest comes from the
+    # cached per-region template
+    return MappingProxyType({
+        **_header_template(region),
+        "Authorization": f"Bearer {token}",
+        "x-app-businessid": business_id,
+    })
+
+
+def build_auth_headers(token: str, business_id: int, region: str) -> Mapping[str, str]:
     """Create a dictionary of HTTP headers required for an authenticated call.
 
     The token is included as a Bearer token and the business ID is
@@ -74,16 +131,9 @@ def build_auth_headers(token: str, business_id: int, region: str) -> Dict[str, s
     :param token: the JWT or session token for the authenticated user
     :param business_id: the business identifier returned by Tecopos
     :param region: the region in which the call is being made
-    :return: a dictionary of headers suitable for use with httpx
+    :return: a read-only mapping of headers suitable for use with httpx.
+        The mapping is memoised per (token, business, region), so repeated
+        calls within a session return the same object; copy it with
+        ``dict(...)`` before adding headers.
     """
-    origin = get_origin_url(region)
-    return {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "Accept": "*/*",
-        "Origin": origin,
-        "Referer": f"{origin}/",
-        "x-app-businessid": str(business_id),
-        "x-app-origin": "Tecopos-Admin",
-        "User-Agent": "Mozilla/5.0",
-    }
\ No newline at end of file
+    return _auth_headers(token, str(business_id), region)
\ No newline at end of file
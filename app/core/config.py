@@ -24,16 +24,26 @@ class Settings(BaseSettings):
 
     The settings structure is flat and uses environment variables
     prefixed with ``APP_``.  For example, to override the default
-    request timeout you can set ``APP_HTTP_TIMEOUT=15``.
+    read timeout you can set ``APP_HTTP_READ_TIMEOUT=30``.
 
     See :class:`pydantic_settings.BaseSettings` for details on how
     environment variables are mapped onto fields.
     """
 
     # HTTP client settings
-    http_timeout: float = Field(10.0, description="Hard timeout for HTTP requests in seconds.")
+    http_connect_timeout: float = Field(5.0, gt=0, description="Timeout for establishing a connection (and acquiring one from the pool) in seconds.")
+    http_read_timeout: float = Field(25.0, gt=0, description="Timeout for reading/writing a response chunk in seconds.")
+    http_request_budget: float = Field(0.0, ge=0, description="End-to-end budget in seconds for outbound calls made while serving one incoming request; 0 disables it.")
     http_max_retries: int = Field(3, ge=0, description="Maximum number of retries for idempotent operations (GET).")
     http_backoff_factor: float = Field(0.5, description="Backoff factor for exponential retry delays.")
+    http_max_connections: int = Field(1000, ge=1, description="Maximum number of concurrent connections in the HTTP pool.")
+    http_max_keepalive: int = Field(100, ge=0, description="Maximum number of idle keep-alive connections kept in the pool.")
+    http_prewarm: bool = Field(True, description="Open connections to the Tecopos hosts in the background at startup.")
+    http_host_concurrency: int = Field(16, ge=1, description="Maximum number of concurrent in-flight requests per host (bulkhead).")
+
+    # Session store
+    redis_url: str | None = Field(None, description="Redis URL for the shared session store (e.g. redis://localhost:6379/0); unset keeps sessions in process memory.")
+    session_ttl: int = Field(3600, ge=1, description="Lifetime in seconds of a session stored in Redis.")
 
     # Pagination guards
     max_pages: int = Field(50, ge=1, description="Maximum number of pages to request when paginating.")
@@ -2,32 +2,81 @@
 core/context.py
 ----------------
 
-In‑memory session store for authenticated users. The ``user_context``
-dictionary preserves the Tecopos token, current business ID and
-region for each user. This state allows multiple requests from the
-same user to reuse authentication information without forcing the
-client to supply credentials on each call. Note that this store
-resides in process memory; in a multi‑worker deployment the state
-will not be shared across workers.
+Session store for authenticated users. The context for each user
+preserves the Tecopos token, current business ID and region. This
+state allows multiple requests from the same user to reuse
+authentication information without forcing the client to supply
+credentials on each call.
+
+By default the store resides in process memory (``user_context``); in
+a multi‑worker deployment that state is not shared across workers. Set
+``APP_REDIS_URL`` to keep sessions in Redis instead, so a login on one
+worker is visible to all of them and survives restarts. Values are
+stored as JSON with a TTL of ``APP_SESSION_TTL`` seconds.
 """
 
 from __future__ import annotations
 
-from typing import Dict, Any
+import threading
+from typing import Any, Dict, Optional
+
+import orjson
+
+from app.core.config import get_settings
 
 user_context: Dict[str, Dict[str, Any]] = {}
 
+_KEY_PREFIX = "ctx:"
+_redis_client: Optional[Any] = None
+_redis_lock = threading.Lock()
+
+
+def _redis() -> Optional[Any]:
+    """Return the shared Redis client, or ``None`` for the in-memory store."""
+    global _redis_client
+    url = get_settings().redis_url
+    if not url:
+        return None
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                # optional dependency: only needed when APP_REDIS_URL is set
+                import redis
+
+                _redis_client = redis.Redis.from_url(url)
+    return _redis_client
+
 
 def set_user_context(username: str, ctx: Dict[str, Any]) -> None:
     """Persist session context for a user."""
-    user_context[username] = ctx
+    client = _redis()
+    if client is None:
+        user_context[username] = ctx
+        return
+    client.set(_KEY_PREFIX + username, orjson.dumps(ctx), ex=get_settings().session_ttl)
 
 
 def get_user_context(username: str) -> Dict[str, Any] | None:
     """Retrieve session context for a user if it exists."""
-    return user_context.get(username)
+    client = _redis()
+    if client is None:
+        return user_context.get(username)
+    raw = client.get(_KEY_PREFIX + username)
+    return orjson.loads(raw) if raw is not None else None
 
 
 def clear_user_context(username: str) -> None:
     """Remove session context for a user."""
-    user_context.pop(username, None)
\ No newline at end of file
+    client = _redis()
+    if client is None:
+        user_context.pop(username, None)
+        return
+    client.delete(_KEY_PREFIX + username)
+
+
+def close_session_store() -> None:
+    """Close the Redis connection pool, if one was opened."""
+    global _redis_client
+    if _redis_client is not None:
+        _redis_client.close()
+        _redis_client = None
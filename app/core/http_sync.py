@@ -13,18 +13,26 @@ Usage example:
 
 from __future__ import annotations
 
+import random
+import threading
 import time
-from typing import Dict, Any, Optional, Tuple
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
 import httpx
 from fastapi import HTTPException
-import requests
 import json
-import time
+import logging
+
+import orjson
 
 # Import logging helpers to record outbound requests.  These
 # functions remove sensitive information from headers and serialise
 # messages as JSON.  See app/logging_config.py for details.
-from app.logging_config import log_http_request, logger
+from app.logging_config import SENSITIVE_HEADERS, _LazyJSON, log_http_request, logger
+from app.utils.cache import TTLCache
 
 # Default timeouts for requests: (connect timeout, read timeout)
 DEFAULT_TIMEOUT: Tuple[float, float] = (10.0, 30.0)
@@ -32,26 +40,264 @@ DEFAULT_TIMEOUT: Tuple[float, float] = (10.0, 30.0)
 # HTTP status codes that should trigger a retry
 RETRY_STATUS = {429, 502, 503, 504}
 
+# Upper bound (seconds) for a single retry delay
+MAX_BACKOFF = 30.0
+
+# Default fan-out for ``teco_batch``
+BATCH_CONCURRENCY = 8
+
 
 # Cliente HTTP singleton para inyección con Depends(get_http_client)
 _client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
 
 def get_http_client() -> httpx.Client:
     """
     Proveedor de cliente HTTP síncrono (inyección FastAPI).
     Usa pool y http2; timeouts razonables para servicios externos (Tecopos).
+    ``teco_request`` también envía por este cliente, así que todas las
+    llamadas a Tecopos comparten conexiones keep-alive.
     """
     global _client
     if _client is None:
-        _client = httpx.Client(
-            http2=True,
-            timeout=httpx.Timeout(connect=10.0, read=60.0, write=60.0, pool=60.0),
-            limits=httpx.Limits(max_connections=200, max_keepalive_connections=40),
-            verify=True,
-        )
+        # teco_batch puede llegar aquí desde varios hilos a la vez: sin el
+        # lock cada uno abriría su propio pool (y sus propios handshakes)
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    http2=True,
+                    timeout=httpx.Timeout(connect=10.0, read=60.0, write=60.0, pool=60.0),
+                    limits=httpx.Limits(max_connections=200, max_keepalive_connections=100, keepalive_expiry=30.0),
+                    verify=True,
+                )
     return _client
 
 
+def warm_http_client(urls: Iterable[str]) -> None:
+    """
+    Abre por adelantado las conexiones del cliente compartido hacia ``urls``
+    (un HEAD por host, en paralelo), para que la primera página que pide
+    ``teco_request`` no pague el handshake TCP/TLS. Best effort: los fallos
+    solo se registran.
+    """
+    client = get_http_client()
+
+    def _head(url: str) -> None:
+        try:
+            client.head(url, timeout=_as_timeout(DEFAULT_TIMEOUT))
+        except Exception as exc:
+            logger.info("%s", _LazyJSON({"event": "http_warmup_failed", "url": url, "detalle": str(exc)}))
+
+    with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY) as pool:
+        list(pool.map(_head, urls))
+
+
+def close_http_client() -> None:
+    """Cierra el cliente compartido (si se llegó a crear) al apagar la app."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def _as_timeout(timeout: Tuple[float, float]) -> httpx.Timeout:
+    connect, read = timeout
+    return httpx.Timeout(read, connect=connect)
+
+
+def _request_key(url: str, params: Optional[Dict[str, Any]], headers: Dict[str, str]) -> Any:
+    # Incluye las cabeceras (token/negocio): nunca se comparte entre usuarios
+    return (
+        url,
+        tuple(sorted((params or {}).items())),
+        tuple(sorted(headers.items())),
+    )
+
+
+# Coalescing de GETs idénticos: respuestas recientes + peticiones en vuelo.
+_GET_CACHE = TTLCache(maxsize=2048)
+_IN_FLIGHT: Dict[Any, "_Pending"] = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+
+
+class _Pending:
+    """Resultado compartido de una petición en vuelo."""
+
+    __slots__ = ("event", "response", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.response: Optional[httpx.Response] = None
+        self.error: Optional[BaseException] = None
+
+
+def _single_flight(key: Any, fn: Callable[[], httpx.Response]) -> httpx.Response:
+    """
+    Ejecuta ``fn`` una sola vez por ``key`` en vuelo: las llamadas
+    concurrentes con la misma clave esperan y reciben el mismo resultado
+    (o la misma excepción).
+    """
+    with _IN_FLIGHT_LOCK:
+        pending = _IN_FLIGHT.get(key)
+        leader = pending is None
+        if leader:
+            pending = _IN_FLIGHT[key] = _Pending()
+
+    if not leader:
+        pending.event.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.response  # type: ignore[return-value]
+
+    try:
+        pending.response = fn()
+        return pending.response
+    except BaseException as exc:
+        pending.error = exc
+        raise
+    finally:
+        with _IN_FLIGHT_LOCK:
+            _IN_FLIGHT.pop(key, None)
+        pending.event.set()
+
+
+def teco_get_coalesced(
+    url: str,
+    *,
+    headers: Dict[str, str],
+    params: Optional[Dict[str, Any]] = None,
+    ttl: float = 30.0,
+) -> httpx.Response:
+    """
+    GET con coalescing: si otra petición idéntica está en vuelo se espera a
+    su resultado en lugar de repetirla, y las respuestas 2xx se reutilizan
+    durante ``ttl`` segundos.
+
+    La clave incluye las cabeceras (token/negocio), así que nunca se
+    comparte una respuesta entre usuarios. Usar solo en lecturas que
+    toleran unos segundos de desfase (áreas, detalle de movimientos).
+    """
+    key = _request_key(url, params, headers)
+    cached = _GET_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    # teco_request ya agrupa los GET idénticos en vuelo
+    resp = teco_request("GET", url, headers=headers, params=params)
+    if 200 <= resp.status_code < 300:
+        _GET_CACHE.set(key, resp, ttl)
+    return resp
+
+
+def teco_json(resp: Any) -> Any:
+    """
+    Decodifica el cuerpo JSON de una respuesta con ``orjson``.
+
+    Equivale a ``resp.json()`` pero el parseo se hace en C, lo que se nota
+    en las páginas grandes de movimientos/stock.
+    """
+    return orjson.loads(resp.content)
+
+
+class _ETagCache:
+    """
+    LRU acotado de respuestas GET con validadores (ETag / Last-Modified).
+
+    Permite reenviar la petición como condicional (``If-None-Match`` /
+    ``If-Modified-Since``) y reutilizar el cuerpo guardado ante un 304, o
+    servirlo directamente mientras ``Cache-Control: max-age`` siga vigente.
+    La clave incluye las cabeceras de autenticación para no mezclar usuarios.
+    Acotado en número (``maxsize``) y en antigüedad (``ttl`` segundos desde
+    la última validación con el servidor).
+    """
+
+    __slots__ = ("_entries", "_lock", "maxsize", "ttl")
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0) -> None:
+        # valor: (etag, last_modified, expires_at, response, validated_at)
+        self._entries: "OrderedDict[Any, Tuple[Optional[str], Optional[str], float, httpx.Response, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+    def get(self, key: Any) -> Optional[Tuple[Optional[str], Optional[str], float, httpx.Response]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[4] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[:4]
+
+    def store(self, key: Any, resp: httpx.Response) -> None:
+        cache_control = resp.headers.get("Cache-Control", "").lower()
+        if "no-store" in cache_control:
+            self.discard(key)
+            return
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        max_age = 0.0 if "no-cache" in cache_control else _max_age(cache_control)
+        if not etag and not last_modified and max_age <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (etag, last_modified, now + max_age, resp, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def refresh(self, key: Any, resp_304: httpx.Response) -> Optional[httpx.Response]:
+        """Tras un 304 renueva la vigencia y devuelve la respuesta guardada."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            etag, last_modified, _, cached, _ = entry
+            max_age = _max_age(resp_304.headers.get("Cache-Control", "").lower())
+            now = time.time()
+            self._entries[key] = (etag, last_modified, now + max_age, cached, now)
+            return cached
+
+    def discard(self, key: Any) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def purge_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for k in [k for k in self._entries if k[0].startswith(prefix)]:
+                del self._entries[k]
+
+
+def _max_age(cache_control: str) -> float:
+    for directive in cache_control.split(","):
+        name, _, value = directive.strip().partition("=")
+        if name == "max-age":
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return 0.0
+    return 0.0
+
+
+_etag_cache = _ETagCache()
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    """Segundos indicados por ``Retry-After`` (entero o fecha HTTP), si hay."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
 
 
 def teco_request(
@@ -60,11 +306,14 @@ def teco_request(
     *,
     headers: Dict[str, str],
     params: Optional[Dict[str, Any]] = None,
-    json: Optional[Dict[str, Any]] = None,
+    json_body: Optional[Dict[str, Any]] = None,
     timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
     retries: int = 2,
     backoff_base: float = 0.5,
-) -> requests.Response:
+    backoff_cap: float = MAX_BACKOFF,
+    client: Optional[httpx.Client] = None,
+    coalesce: bool = True,
+) -> httpx.Response:
     """
     Perform an HTTP request with automatic retries and timeouts.
 
@@ -78,7 +327,7 @@ def teco_request(
         HTTP headers to include in the request.
     params : dict, optional
         Query string parameters for GET requests.
-    json : dict, optional
+    json_body : dict, optional
         JSON payload for POST/PUT/PATCH requests.
     timeout : tuple, optional
         A (connect_timeout, read_timeout) tuple in seconds.
@@ -86,38 +335,163 @@ def teco_request(
         The maximum number of retry attempts on transient errors.
     backoff_base : float, optional
         Base delay in seconds used for exponential backoff.
+    backoff_cap : float, optional
+        Maximum delay in seconds for a single retry, including ``Retry-After``.
+    client : httpx.Client, optional
+        Client to send through; defaults to the pooled :func:`get_http_client`.
+    coalesce : bool, optional
+        For GETs, share one upstream call among concurrent identical
+        requests (same URL, params and headers).
 
     Returns
     -------
-    requests.Response
+    httpx.Response
         The final HTTP response.
     """
+    method_u = method.upper()
+    if coalesce and method_u == "GET":
+        return _single_flight(
+            _request_key(url, params, headers),
+            lambda: teco_request(
+                method, url, headers=headers, params=params, json_body=json_body, timeout=timeout,
+                retries=retries, backoff_base=backoff_base, backoff_cap=backoff_cap,
+                client=client, coalesce=False,
+            ),
+        )
+    if client is None:
+        client = get_http_client()
+    request_timeout = _as_timeout(timeout)
     attempt = 0
-    # Ensure we do not leak sensitive headers
-    safe_headers = {k: v for k, v in headers.items() if k.lower() not in {"authorization", "x-app-businessid"}}
-    start_time = time.time()
+    # Ensure we do not leak sensitive headers; only built when DEBUG is on
+    safe_headers = (
+        {k: v for k, v in headers.items() if k.lower() not in SENSITIVE_HEADERS}
+        if logger.isEnabledFor(logging.DEBUG)
+        else None
+    )
+    start_time = time.perf_counter()
     # Log the request at debug level before sending
-    log_http_request(method.upper(), url, headers=safe_headers, params=params, json_body=json)
+    log_http_request(method_u, url, headers=safe_headers, headers_sanitized=True, params=params, json_body=json_body)
+    # GET: revalidación condicional contra la caché de ETag
+    cache_key = None
+    send_headers = headers
+    if method_u == "GET":
+        cache_key = _request_key(url, params, headers)
+        entry = _etag_cache.get(cache_key)
+        if entry is not None:
+            etag, last_modified, expires_at, cached = entry
+            if expires_at > time.time():
+                log_http_request(method_u, url, headers=safe_headers, headers_sanitized=True, params=params, json_body=json_body, status=cached.status_code, duration_ms=0.0)
+                return cached
+            send_headers = dict(headers)
+            if etag:
+                send_headers["If-None-Match"] = etag
+            if last_modified:
+                send_headers["If-Modified-Since"] = last_modified
     while True:
         try:
-            resp = requests.request(method=method, url=url, headers=headers, params=params, json=json, timeout=timeout)
+            resp = client.request(method_u, url, headers=send_headers, params=params, json=json_body, timeout=request_timeout)
         except Exception as exc:
             # Log the exception
-            duration_ms = (time.time() - start_time) * 1000
+            duration_ms = (time.perf_counter() - start_time) * 1000
             logger.error(json.dumps({
                 "event": "http_error",
-                "method": method.upper(),
+                "method": method_u,
                 "url": url,
                 "detail": str(exc),
             }), exc_info=True)
-            log_http_request(method.upper(), url, headers=safe_headers, params=params, json_body=json, status=None, duration_ms=duration_ms)
+            log_http_request(method_u, url, headers=safe_headers, headers_sanitized=True, params=params, json_body=json_body, status=None, duration_ms=duration_ms)
             raise
         # Check if retry is needed
         if resp.status_code in RETRY_STATUS and attempt < retries:
             attempt += 1
-            time.sleep(backoff_base * (2 ** (attempt - 1)))
+            # honour Retry-After; otherwise full jitter across the backoff window
+            delay = _retry_after(resp)
+            if delay is None:
+                delay = random.uniform(0, min(backoff_cap, backoff_base * (2 ** (attempt - 1))))
+            time.sleep(min(delay, backoff_cap))
             continue
+        if cache_key is not None:
+            if resp.status_code == 304:
+                cached = _etag_cache.refresh(cache_key, resp)
+                if cached is not None:
+                    resp = cached
+                elif send_headers is not headers:
+                    # la entrada se fue (LRU o purga por escritura) entre el
+                    # envío y el 304: repetir sin validadores para tener cuerpo
+                    send_headers = headers
+                    continue
+            elif resp.status_code == 200:
+                _etag_cache.store(cache_key, resp)
+        elif method_u not in ("HEAD", "OPTIONS") and resp.status_code < 400:
+            # una escritura invalida lo cacheado bajo la misma colección,
+            # también las respuestas recientes de teco_get_coalesced
+            prefix = url.rsplit("/", 1)[0]
+            _etag_cache.purge_prefix(prefix)
+            _GET_CACHE.delete_matching(lambda k: k[0].startswith(prefix))
         # Log completion
-        duration_ms = (time.time() - start_time) * 1000
-        log_http_request(method.upper(), url, headers=safe_headers, params=params, json_body=json, status=resp.status_code, duration_ms=duration_ms)
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        log_http_request(method_u, url, headers=safe_headers, headers_sanitized=True, params=params, json_body=json_body, status=resp.status_code, duration_ms=duration_ms)
         return resp
+
+
+def teco_batch(
+    calls: List[Dict[str, Any]],
+    *,
+    send: Callable[..., httpx.Response] = teco_request,
+    max_workers: int = BATCH_CONCURRENCY,
+    return_exceptions: bool = False,
+) -> List[Union[httpx.Response, Exception]]:
+    """
+    Ejecuta varias peticiones en paralelo y devuelve las respuestas en el
+    mismo orden que ``calls``.
+
+    Cada elemento de ``calls`` son los kwargs de ``send`` (por defecto
+    :func:`teco_request`, p.ej. ``{"method": "GET", "url": ..., "headers": ...}``).
+    Con un ``HTTPClient`` compartido se puede pasar ``send=http_client.request``.
+    La latencia total pasa de la suma de RTTs al máximo (acotado por
+    ``max_workers``). Con ``return_exceptions=True`` los errores se
+    devuelven en su posición en lugar de propagarse.
+    """
+    if not calls:
+        return []
+
+    def _one(call: Dict[str, Any]) -> Union[httpx.Response, Exception]:
+        try:
+            return send(**call)
+        except Exception as exc:
+            if return_exceptions:
+                return exc
+            raise
+
+    if len(calls) == 1:
+        return [_one(calls[0])]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(calls)))) as executor:
+        # cada hilo hereda el contexto del llamante (p.ej. request_deadline)
+        futures = [executor.submit(contextvars.copy_context().run, _one, call) for call in calls]
+        return [f.result() for f in futures]
+
+
+def teco_pages(
+    call_for_page: Callable[[int], Dict[str, Any]],
+    *,
+    send: Callable[..., httpx.Response] = teco_request,
+    window: int = BATCH_CONCURRENCY,
+    max_pages: Optional[int] = None,
+) -> Iterator[Tuple[int, Union[httpx.Response, Exception]]]:
+    """
+    Recorre una paginación sin total conocido pidiendo varias páginas a la vez.
+
+    Produce ``(pagina, respuesta_o_excepcion)`` en orden. La primera página
+    se pide sola y la ventana se duplica en cada tanda hasta ``window``, así
+    que un inventario de una página cuesta una sola petición y, al llegar al
+    final, se desperdician como mucho las peticiones de la última tanda.
+    El consumidor decide dónde termina (página vacía, repetida...) haciendo
+    ``break``; ``call_for_page(n)`` devuelve los kwargs de ``send``.
+    """
+    page, size = 1, 1
+    while max_pages is None or page <= max_pages:
+        last = page + size - 1 if max_pages is None else min(page + size - 1, max_pages)
+        numbers = range(page, last + 1)
+        responses = teco_batch([call_for_page(n) for n in numbers], send=send, max_workers=window, return_exceptions=True)
+        yield from zip(numbers, responses)
+        page, size = last + 1, min(size * 2, window)
@@ -18,12 +18,20 @@ passwords.
 
 from __future__ import annotations
 
+import atexit
+import inspect
 import json
 import logging
+import logging.handlers
+import os
+import queue
+import re
 import sys
 from functools import wraps
 from typing import Any, Callable, Dict
 
+import orjson
+
 # -----------------------------------------------------------------------------
 # Configure global logging
 # -----------------------------------------------------------------------------
@@ -31,25 +39,98 @@ from typing import Any, Callable, Dict
 # Set up the root logger once.  We direct log output to stdout and format
 # messages with a timestamp, log level and the raw message.  The message
 # itself should be a JSON string so downstream consumers can parse it easily.
+#
+# Records are handed to a queue and written by a background listener
+# thread, so neither request handlers nor the event loop block on stdout.
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock ``prepare`` formats the message in the calling thread, which
+    would undo the point of lazy payloads such as ``_LazyJSON``.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _stdout_handler, respect_handler_level=True)
+_log_listener.start()
+# threads do not survive fork(): restart the writer in forked workers
+os.register_at_fork(after_in_child=_log_listener.start)
+# flush pending records on interpreter shutdown
+atexit.register(_log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s %(levelname)s %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout)],
+    handlers=[_DeferredQueueHandler(_log_queue)],
 )
 
 # Expose a module level logger.  Code elsewhere can import this and log
 # messages without repeatedly instantiating new Logger instances.
 logger = logging.getLogger("tecopos")
 
+# Header names (lower-case) that must never reach the logs.
+SENSITIVE_HEADERS = frozenset({"authorization", "x-app-businessid"})
+
+# Payload keys containing any of these words are dropped by ``_sanitize``.
+_SENSITIVE_RE = re.compile(r"token|password|secret", re.IGNORECASE)
+
+# Size guards for ``_sanitize`` so a large payload cannot balloon a log record.
+_MAX_STR_LEN = 4096
+_MAX_ITEMS = 64
+_MAX_DEPTH = 8
+
+
+class _LazyJSON:
+    """Defer JSON serialisation until a handler actually emits the record.
+
+    ``logger.debug("%s", _LazyJSON(data))`` costs almost nothing when the
+    level is filtered out, because logging only calls ``__str__`` on
+    records that are handled.  Serialisation happens on the listener
+    thread, so ``data`` must not reference objects the caller mutates
+    afterwards; copy those when building it.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Any) -> None:
+        self.data = data
+
+    def __str__(self) -> str:
+        return _dumps(self.data)
 
-def _sanitize(obj: Any) -> Any:
+
+def _dumps(data: Any) -> str:
+    """Serialise ``data`` with orjson, falling back to the stdlib encoder."""
+    try:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    except Exception:
+        try:
+            return json.dumps(data, default=str)
+        except Exception:
+            return str(data)
+
+
+def _truncate(s: str) -> str:
+    if len(s) <= _MAX_STR_LEN:
+        return s
+    return f"{s[:_MAX_STR_LEN]}...[truncated {len(s) - _MAX_STR_LEN} chars]"
+
+
+def _sanitize(obj: Any, _depth: int = 0) -> Any:
     """Recursively sanitise objects for logging.
 
     The goal of this helper is to prevent sensitive information such as
     authentication tokens, passwords or binary payloads from ending up in
     the logs.  Dictionaries will have keys containing 'token', 'password'
     or 'secret' removed.  Lists and tuples are processed element‑wise.  All
-    other objects are returned unchanged.
+    other objects are returned unchanged.  Long strings, large containers
+    and deep nesting are truncated so one payload cannot bloat the logs.
 
     Parameters
     ----------
@@ -61,29 +142,42 @@ def _sanitize(obj: Any) -> Any:
     Any
         A sanitised representation of the input suitable for JSON serialisation.
     """
+    # Scalars (the common case for log_call arguments) are returned as is
+    if obj is None or isinstance(obj, (int, float, bool)):
+        return obj
+    if isinstance(obj, str):
+        return _truncate(obj)
     # Avoid logging file contents or byte strings directly
     if isinstance(obj, (bytes, bytearray)):
         return f"<binary {len(obj)} bytes>"
+    if _depth >= _MAX_DEPTH:
+        return f"<{type(obj).__name__} nested too deep>"
     if isinstance(obj, dict):
         clean: Dict[str, Any] = {}
         for k, v in obj.items():
-            if any(keyword in str(k).lower() for keyword in ("token", "password", "secret")):
+            if isinstance(k, str) and _SENSITIVE_RE.search(k):
                 continue
-            clean[k] = _sanitize(v)
+            if len(clean) >= _MAX_ITEMS:
+                clean["..."] = f"[truncated {len(obj) - _MAX_ITEMS} keys]"
+                break
+            clean[k] = _sanitize(v, _depth + 1)
         return clean
     if isinstance(obj, (list, tuple)):
-        return [_sanitize(i) for i in obj]
+        items = [_sanitize(i, _depth + 1) for i in obj[:_MAX_ITEMS]]
+        if len(obj) > _MAX_ITEMS:
+            items.append(f"...[truncated {len(obj) - _MAX_ITEMS} items]")
+        return items
     # For objects with a dict representation (e.g. Pydantic models), attempt to
     # use that for logging.  If conversion fails just return the repr.
     try:
+        if hasattr(obj, "model_dump"):
+            return _sanitize(obj.model_dump(), _depth)  # type: ignore[attr-defined]
         if hasattr(obj, "dict"):
-            return _sanitize(obj.dict())  # type: ignore[attr-defined]
+            return _sanitize(obj.dict(), _depth)  # type: ignore[attr-defined]
     except Exception:
         pass
-    try:
-        return json.loads(json.dumps(obj))  # ensure JSON serialisable
-    except Exception:
-        return str(obj)
+    # Anything else is not JSON native: log its string form
+    return _truncate(str(obj))
 
 
 def log_call(func: Callable[..., Any]) -> Callable[..., Any]:
@@ -114,54 +208,52 @@ def log_call(func: Callable[..., Any]) -> Callable[..., Any]:
         sensitive information.  Any errors during logging are silently
         ignored so as not to impact application behaviour.
         """
+        # Sanitising walks the whole payload, so only do it when DEBUG
+        # records will actually be emitted.
+        if not logger.isEnabledFor(logging.DEBUG):
+            return func(*args, **kwargs)
         try:
-            args_repr = _sanitize(args)
-            kwargs_repr = _sanitize(kwargs)
-            logger.debug(json.dumps({
+            logger.debug("%s", _LazyJSON({
                 "event": "call_start",
                 "function": func.__name__,
-                "args": args_repr,
-                "kwargs": kwargs_repr,
+                "args": _sanitize(args),
+                "kwargs": _sanitize(kwargs),
             }))
         except Exception:
             # If sanitisation or logging fails, still proceed with the call
-            logger.debug(json.dumps({"event": "call_start", "function": func.__name__}))
+            logger.debug("%s", _LazyJSON({"event": "call_start", "function": func.__name__}))
         # Invoke the actual function
         result = func(*args, **kwargs)
         try:
-            result_repr = _sanitize(result)
-            logger.debug(json.dumps({
+            logger.debug("%s", _LazyJSON({
                 "event": "call_end",
                 "function": func.__name__,
-                "result": result_repr,
+                "result": _sanitize(result),
             }))
         except Exception:
-            logger.debug(json.dumps({"event": "call_end", "function": func.__name__}))
+            logger.debug("%s", _LazyJSON({"event": "call_end", "function": func.__name__}))
         return result
 
     # Copy the signature of the wrapped function so FastAPI and other
     # introspection tools see the original parameters and annotations.
+    # Annotations are resolved here against the wrapped function's own
+    # module (e.g. Pydantic models like ``LoginData``), so the wrapper never
+    # needs that module's globals.  See https://errors.pydantic.dev/2.8/u/undefined-annotation
     try:
-        import inspect  # imported here to avoid a global dependency
-        wrapper.__signature__ = inspect.signature(func)
+        wrapper.__signature__ = inspect.signature(func, eval_str=True)
     except Exception:
-        pass
-
-    # Merge the global namespace of the wrapped function into the wrapper's
-    # globals.  Without this, annotations defined in the original module (e.g.
-    # Pydantic models like ``LoginData``) may not be resolvable when the
-    # wrapper is inspected by FastAPI.  See https://errors.pydantic.dev/2.8/u/undefined-annotation
-    try:
-        wrapper.__globals__.update(func.__globals__)
-    except Exception:
-        pass
+        try:
+            wrapper.__signature__ = inspect.signature(func)
+        except Exception:
+            pass
 
     return wrapper
 
 
 def log_http_request(method: str, url: str, *, headers: Dict[str, Any] | None = None,
                      params: Dict[str, Any] | None = None, json_body: Dict[str, Any] | None = None,
-                     status: int | None = None, duration_ms: float | None = None) -> None:
+                     status: int | None = None, duration_ms: float | None = None,
+                     headers_sanitized: bool = False) -> None:
     """Log an outbound HTTP request at DEBUG level.
 
     This helper centralises HTTP request logging so that tokens are
@@ -186,20 +278,31 @@ def log_http_request(method: str, url: str, *, headers: Dict[str, Any] | None =
         Response status code (log end only).
     duration_ms : float, optional
         Time taken in milliseconds (log end only).
+    headers_sanitized : bool, optional
+        ``True`` when the caller already removed the sensitive headers,
+        so they are not filtered a second time.
     """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     data: Dict[str, Any] = {
         "event": "http_request",
         "method": method,
         "url": url,
     }
-    if headers is not None:
-        data["headers"] = {k: v for k, v in headers.items() if k.lower() not in {"authorization", "x-app-businessid"}}
+    # Records are formatted later on the listener thread, so keep copies:
+    # callers reuse and mutate these dicts (e.g. params["page"] per page).
+    if headers:
+        if headers_sanitized:
+            headers = dict(headers)
+        else:
+            headers = {k: v for k, v in headers.items() if k.lower() not in SENSITIVE_HEADERS}
+        data["headers"] = headers
     if params:
-        data["params"] = params
+        data["params"] = dict(params)
     if json_body:
         data["json"] = _sanitize(json_body)
     if status is not None:
         data["status"] = status
     if duration_ms is not None:
         data["duration_ms"] = round(duration_ms, 2)
-    logger.debug(json.dumps(data))
\ No newline at end of file
+    logger.debug("%s", _LazyJSON(data))
\ No newline at end of file
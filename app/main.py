@@ -1,18 +1,26 @@
 # main.py
 from __future__ import annotations
 
+import hashlib
+import orjson
+import threading
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
+from pathlib import Path
+from fastapi import FastAPI, Request, Response
 from fastapi.responses import ORJSONResponse
 
 # Import logging utilities early so that the logger configuration is
 # applied before any other modules emit log messages.  The logger is
 # used throughout the application for structured JSON logging.
-from app.logging_config import logger
-import json
+from app.logging_config import _LazyJSON, logger
+import logging
 import time
 
-from app.clients.http_client import HTTPClient
+from app.clients.http_client import HTTPClient, request_deadline
+from app.core.auth import all_base_urls
+from app.core.config import get_settings
+from app.core.context import close_session_store
+from app.core.http_sync import close_http_client, warm_http_client
 from app.routes.auth import router as auth_router
 from app.routes.products import router as products_router
 from app.routes.reports import router as reports_router
@@ -23,28 +31,85 @@ from app.routes.rendimiento import router as rendimiento_router
 from app.routes.inventario import router as inventario_router
 from app.routes import rendimiento_descomposicion as rendimiento_descomposicion_routes
 
+# Routers registrados por create_app(), una sola vez cada uno
+ROUTERS = (
+    auth_router,
+    products_router,
+    reports_router,
+    currency_router,
+    dispatch_router,
+    carga_router,
+    rendimiento_router,
+    inventario_router,
+    rendimiento_descomposicion_routes.router,
+)
+
+# Descriptor del plugin: se lee una vez al importar y se sirve desde memoria
+WELLKNOWN_DIR = Path(__file__).resolve().parent.parent / ".well-known"
+try:
+    PLUGIN_BYTES: bytes | None = (WELLKNOWN_DIR / "ai-plugin.json").read_bytes()
+except OSError:
+    PLUGIN_BYTES = None
+PLUGIN_ETAG = f'"{hashlib.md5(PLUGIN_BYTES).hexdigest()}"' if PLUGIN_BYTES is not None else None
+PLUGIN_HEADERS = {"Cache-Control": "public, max-age=3600", "ETag": PLUGIN_ETAG or ""}
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # crear y compartir el cliente HTTP
     app.state.http_client = HTTPClient()  # conexiones reutilizadas
+    if get_settings().http_prewarm:
+        # handshakes TLS en segundo plano: no retrasan el arranque
+        threading.Thread(
+            target=app.state.http_client.warmup, args=(all_base_urls(),), daemon=True,
+        ).start()
+        # y el pool de teco_request, que recorre la paginación de inventario
+        threading.Thread(target=warm_http_client, args=(all_base_urls(),), daemon=True).start()
     try:
         yield
     finally:
         app.state.http_client.close()
+        close_http_client()
+        close_session_store()
 
 def create_app() -> FastAPI:
     app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
     # registrar routers
-    app.include_router(auth_router)
-    app.include_router(products_router)
-    app.include_router(reports_router)
-    app.include_router(currency_router)
-    app.include_router(dispatch_router)
-    app.include_router(carga_router)
-    app.include_router(rendimiento_router)
-    app.include_router(inventario_router)
-    app.include_router(rendimiento_descomposicion_routes.router)
+    for router in ROUTERS:
+        app.include_router(router)
+    # una ruta registrada dos veces queda tapada en silencio por la primera
+    vistas: set[tuple[str, str]] = set()
+    for route in app.router.routes:
+        for method in getattr(route, "methods", None) or ():
+            clave = (method, getattr(route, "path", ""))
+            if clave in vistas:
+                raise RuntimeError(f"Ruta duplicada: {method} {clave[1]}")
+            vistas.add(clave)
+
+    # -----------------------------------------------------------------
+    # OpenAPI servido desde bytes precalculados
+    # -----------------------------------------------------------------
+    # FastAPI cachea el dict en ``app.openapi_schema`` pero lo vuelve a
+    # serializar en cada GET. Se sustituye su ruta por una que serializa
+    # una sola vez (tras registrar todos los routers) y reutiliza los bytes.
+    openapi_url = app.openapi_url
+    if openapi_url:
+        app.router.routes[:] = [r for r in app.router.routes if getattr(r, "path", None) != openapi_url]
+        openapi_bytes: list[bytes] = []
+
+        @app.get(openapi_url, include_in_schema=False)
+        def openapi_json() -> Response:
+            if not openapi_bytes:
+                openapi_bytes.append(orjson.dumps(app.openapi()))
+            return Response(content=openapi_bytes[0], media_type="application/json")
+
+    if PLUGIN_BYTES is not None:
+        @app.get("/.well-known/ai-plugin.json", include_in_schema=False)
+        def ai_plugin(request: Request) -> Response:
+            if request.headers.get("if-none-match") == PLUGIN_ETAG:
+                return Response(status_code=304, headers=PLUGIN_HEADERS)
+            return Response(content=PLUGIN_BYTES, media_type="application/json", headers=PLUGIN_HEADERS)
 
     # -----------------------------------------------------------------
     # Middleware de logging de requests
@@ -53,22 +118,30 @@ def create_app() -> FastAPI:
     # camino, método HTTP, código de respuesta y tiempo de procesado. Al
     # utilizar ``logger.info`` con JSON serializado, se facilita la
     # integración con herramientas de observabilidad en producción.
+    # Si APP_HTTP_REQUEST_BUDGET > 0, todas las llamadas salientes hechas
+    # durante la solicitud comparten ese presupuesto total.
+    request_budget = get_settings().http_request_budget
+
     @app.middleware("http")  # type: ignore[misc]
     async def log_requests(request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        duration_ms = (time.time() - start_time) * 1000
+        start_time = time.perf_counter()
+        token = request_deadline.set(time.monotonic() + request_budget) if request_budget > 0 else None
         try:
-            logger.info(json.dumps({
-                "event": "http_request",
-                "path": request.url.path,
-                "method": request.method,
-                "status": response.status_code,
-                "duration_ms": round(duration_ms, 2),
-            }))
-        except Exception:
-            # fallback en caso de que falle la serialización
-            logger.info(f"{request.method} {request.url.path} -> {response.status_code} ({round(duration_ms,2)} ms)")
+            response = await call_next(request)
+        finally:
+            if token is not None:
+                request_deadline.reset(token)
+        if not logger.isEnabledFor(logging.INFO):
+            return response
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        # serialización diferida: solo se genera el JSON si el registro se emite
+        logger.info("%s", _LazyJSON({
+            "event": "http_request",
+            "path": request.url.path,
+            "method": request.method,
+            "status": response.status_code,
+            "duration_ms": round(duration_ms, 2),
+        }))
         return response
 
     return app
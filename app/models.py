@@ -14,7 +14,7 @@ reasonable default values are provided where appropriate.
 from datetime import datetime, date
 from typing import List, Optional, Literal, Dict
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class LoginData(BaseModel):
@@ -37,8 +37,7 @@ class SeleccionNegocio(BaseModel):
     usuario: str
     nombre_negocio: str = Field(alias="negocio")
 
-    class Config:
-        allow_population_by_field_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class AnalisisDesempenoRequest(BaseModel):
@@ -96,13 +95,15 @@ class ProductoEntradaInteligente(BaseModel):
     precio: float
     moneda: str = "CUP"
 
-    @validator("cantidad")
+    @field_validator("cantidad")
+    @classmethod
     def validar_cantidad_positiva(cls, v: int) -> int:
         if v <= 0:
             raise ValueError("La cantidad debe ser mayor que cero")
         return v
 
-    @validator("nombre")
+    @field_validator("nombre")
+    @classmethod
     def validar_nombre_no_vacio(cls, v: str) -> str:
         if not v.strip():
             raise ValueError("El nombre del producto no puede estar vacío")
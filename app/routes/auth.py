@@ -13,34 +13,26 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends
 
 from app.clients.http_client import HTTPClient
-from app.logging_config import logger  # import logger for explicit logging; decorators removed
-import json
+from app.routes.deps import get_http_client
+from app.logging_config import _LazyJSON, logger
 from app.schemas.auth import LoginData, SeleccionNegocio
 from app.services.auth_service import login_user, seleccionar_negocio
 
 router = APIRouter()
 
 
-from fastapi import Request
-
-
-def get_http_client(request: Request) -> HTTPClient:
-    """Dependency to retrieve the shared HTTP client from the application state."""
-    return request.app.state.http_client
-
-
 @router.post("/login-tecopos")
 def login_tecopos(data: LoginData, http_client: HTTPClient = Depends(get_http_client)):
     # Log entry into the endpoint
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "login_tecopos_request",
             "usuario": data.usuario,
             "region": data.region,
         }))
     except Exception:
         # Ensure logging does not break functionality
-        logger.info(json.dumps({"event": "login_tecopos_request"}))
+        logger.info("%s", _LazyJSON({"event": "login_tecopos_request"}))
     return login_user(data, http_client)
 
 
@@ -48,12 +40,12 @@ def login_tecopos(data: LoginData, http_client: HTTPClient = Depends(get_http_cl
 def post_seleccionar_negocio(data: SeleccionNegocio, http_client: HTTPClient = Depends(get_http_client)):
     # Log entry into the endpoint
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "seleccionar_negocio_request",
             "usuario": data.usuario,
             "negocio": data.nombre_negocio,
         }))
     except Exception:
-        logger.info(json.dumps({"event": "seleccionar_negocio_request"}))
+        logger.info("%s", _LazyJSON({"event": "seleccionar_negocio_request"}))
     return seleccionar_negocio(data, http_client)
 
@@ -9,12 +9,17 @@ available cargas and verifying product existence.
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Request
+from typing import Iterator
+
+import orjson
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
 # Logging utilities
-from app.logging_config import logger  # import only logger
-import json
+from app.logging_config import _LazyJSON, logger
 from app.clients.http_client import HTTPClient
+from app.routes.deps import get_http_client
+from app.core.routing import ORJSONRoute
 from app.schemas.carga import (
     CrearCargaConProductosRequest,
     EntradaProductosEnCargaRequest,
@@ -24,23 +29,20 @@ from app.schemas.carga import (
 from app.services.carga_service import (
     crear_carga_con_productos,
     entrada_productos_en_carga,
-    listar_cargas_disponibles,
+    iter_cargas_disponibles,
     verificar_productos_existen,
 )
 
 
-router = APIRouter()
-
-
-def get_http_client(request: Request) -> HTTPClient:
-    return request.app.state.http_client
+# cuerpos con listas largas de productos: JSON decodificado con orjson
+router = APIRouter(route_class=ORJSONRoute)
 
 
 @router.post("/crear-carga-con-productos")
 def post_crear_carga_con_productos(data: CrearCargaConProductosRequest, http_client: HTTPClient = Depends(get_http_client)):
     """Crea una nueva carga con productos incluidos. Registra eventos de inicio y finalización."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "crear_carga_request",
             "usuario": data.usuario,
             "num_productos": len(data.productos) if data.productos else 0,
@@ -50,14 +52,14 @@ def post_crear_carga_con_productos(data: CrearCargaConProductosRequest, http_cli
     try:
         resp = crear_carga_con_productos(data, http_client)
         # Resumen de la respuesta
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "crear_carga_response",
             "usuario": data.usuario,
             "mensaje": resp.get("mensaje"),
         }))
         return resp
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "crear_carga_error",
             "usuario": getattr(data, 'usuario', None),
             "detalle": str(e),
@@ -69,7 +71,7 @@ def post_crear_carga_con_productos(data: CrearCargaConProductosRequest, http_cli
 def post_entrada_productos_en_carga(data: EntradaProductosEnCargaRequest, http_client: HTTPClient = Depends(get_http_client)):
     """Registra productos dentro de una carga existente. Registra eventos para trazabilidad."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "entrada_productos_en_carga_request",
             "usuario": data.usuario,
             "carga_id": data.carga_id,
@@ -79,7 +81,7 @@ def post_entrada_productos_en_carga(data: EntradaProductosEnCargaRequest, http_c
         pass
     try:
         resp = entrada_productos_en_carga(data, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "entrada_productos_en_carga_response",
             "usuario": data.usuario,
             "registrados": len(resp.get("registrados", [])) if isinstance(resp.get("registrados"), list) else None,
@@ -87,7 +89,7 @@ def post_entrada_productos_en_carga(data: EntradaProductosEnCargaRequest, http_c
         }))
         return resp
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "entrada_productos_en_carga_error",
             "usuario": getattr(data, 'usuario', None),
             "detalle": str(e),
@@ -100,35 +102,61 @@ def post_entrada_productos_en_carga(data: EntradaProductosEnCargaRequest, http_c
 def get_listar_cargas_disponibles(usuario: str, http_client: HTTPClient = Depends(get_http_client)):
     """Lista cargas disponibles para el usuario y registra eventos de inicio y fin."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "listar_cargas_request",
             "usuario": usuario,
         }))
     except Exception:
         pass
     try:
-        resp = listar_cargas_disponibles(usuario, http_client)
-        logger.info(json.dumps({
-            "event": "listar_cargas_response",
-            "usuario": usuario,
-            "num_cargas": len(resp.get("cargas_disponibles", [])) if isinstance(resp.get("cargas_disponibles"), list) else None,
-        }))
-        return resp
+        paginas = iter_cargas_disponibles(usuario, http_client)
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "listar_cargas_error",
             "usuario": usuario,
             "detalle": str(e),
         }), exc_info=True)
         raise
 
+    # Mismo JSON de siempre ({"cargas_disponibles": [...]}), pero enviado
+    # página a página: el cliente recibe datos tras la primera página y no
+    # se retiene la lista completa ni su copia serializada.
+    def cuerpo() -> Iterator[bytes]:
+        num_cargas = 0
+        yield b'{"cargas_disponibles":['
+        try:
+            for pagina in paginas:
+                if pagina:
+                    trozo = b",".join(orjson.dumps(carga) for carga in pagina)
+                    yield (b"," + trozo) if num_cargas else trozo
+                    num_cargas += len(pagina)
+        except Exception as e:
+            # las cabeceras ya se enviaron: solo queda registrar y cortar
+            logger.error("%s", _LazyJSON({
+                "event": "listar_cargas_error",
+                "usuario": usuario,
+                "detalle": str(e),
+                "num_cargas_enviadas": num_cargas,
+            }), exc_info=True)
+            raise
+        yield b"]}"
+        logger.info("%s", _LazyJSON({
+            "event": "listar_cargas_response",
+            "usuario": usuario,
+            "num_cargas": num_cargas,
+        }))
 
-@router.post("/verificar-productos-existen", response_model=ProductosFaltantesResponse)
+    return StreamingResponse(cuerpo(), media_type="application/json")
+
+
+# Sin response_model: la salida la construye el servicio (confiable) y se
+# serializa directamente; ``responses`` mantiene el esquema en OpenAPI.
+@router.post("/verificar-productos-existen", responses={200: {"model": ProductosFaltantesResponse}})
 
 def post_verificar_productos_existen(data: VerificarProductosRequest, http_client: HTTPClient = Depends(get_http_client)):
     """Verifica que una lista de productos exista en el sistema. Registra eventos clave."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "verificar_productos_request",
             "usuario": data.usuario,
             "num_nombres": len(data.nombres_productos) if data.nombres_productos else 0,
@@ -137,14 +165,14 @@ def post_verificar_productos_existen(data: VerificarProductosRequest, http_clien
         pass
     try:
         resp = verificar_productos_existen(data, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "verificar_productos_response",
             "usuario": data.usuario,
             "productos_faltantes": len(resp.productos_faltantes),
         }))
-        return resp
+        return ORJSONResponse(content={"productos_faltantes": resp.productos_faltantes})
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "verificar_productos_error",
             "usuario": getattr(data, 'usuario', None),
             "detalle": str(e),
@@ -9,12 +9,13 @@ before applying them.
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 
 # Logging utilities
-from app.logging_config import logger  # import only logger
-import json
+from app.logging_config import _LazyJSON, logger
 from app.clients.http_client import HTTPClient
+from app.routes.deps import get_http_client
 from app.schemas.currency import CambioMonedaRequest
 from app.services.currency_service import actualizar_monedas
 
@@ -22,15 +23,11 @@ from app.services.currency_service import actualizar_monedas
 router = APIRouter()
 
 
-def get_http_client(request: Request) -> HTTPClient:
-    return request.app.state.http_client
-
-
 @router.post("/actualizar-monedas")
 def post_actualizar_monedas(data: CambioMonedaRequest, http_client: HTTPClient = Depends(get_http_client)):
     """Actualiza o simula la actualización de monedas de forma masiva."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "actualizar_monedas_request",
             "usuario": data.usuario,
             "moneda_actual": data.moneda_actual,
@@ -42,15 +39,17 @@ def post_actualizar_monedas(data: CambioMonedaRequest, http_client: HTTPClient =
         pass
     try:
         resp = actualizar_monedas(data, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "actualizar_monedas_response",
             "usuario": data.usuario,
             "status": resp.get("status"),
             "mensaje": resp.get("mensaje"),
         }))
-        return resp
+        # Respuesta directa: evita el recorrido de jsonable_encoder sobre
+        # la lista de productos actualizados
+        return ORJSONResponse(content=resp)
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "actualizar_monedas_error",
             "usuario": getattr(data, 'usuario', None),
             "detalle": str(e),
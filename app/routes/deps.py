@@ -0,0 +1,17 @@
+"""
+routes/deps.py
+--------------
+
+Shared FastAPI dependencies for the route modules.
+"""
+
+from __future__ import annotations
+
+from fastapi import Request
+
+from app.clients.http_client import HTTPClient
+
+
+def get_http_client(request: Request) -> HTTPClient:
+    """Dependency to retrieve the shared HTTP client from the application state."""
+    return request.app.state.http_client
@@ -10,12 +10,12 @@ replication.
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends
 
 # Logging utilities
-from app.logging_config import logger  # import only logger
-import json
+from app.logging_config import _LazyJSON, logger
 from app.clients.http_client import HTTPClient
+from app.routes.deps import get_http_client
 from app.schemas.dispatch import ReplicarProductosRequest
 from app.services.dispatch_service import replicar_productos
 
@@ -23,16 +23,12 @@ from app.services.dispatch_service import replicar_productos
 router = APIRouter()
 
 
-def get_http_client(request: Request) -> HTTPClient:
-    return request.app.state.http_client
-
-
 @router.post("/replicar-productos", summary="Replicar productos entre negocios mediante despacho Tecopos", tags=["Despachos"])
 
 def post_replicar_productos(data: ReplicarProductosRequest, http_client: HTTPClient = Depends(get_http_client)):
     """Inicia la replicación de productos entre negocios mediante un despacho Tecopos."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "replicar_productos_request",
             "usuario": data.usuario,
             "negocio_origen_id": data.negocio_origen_id,
@@ -45,14 +41,14 @@ def post_replicar_productos(data: ReplicarProductosRequest, http_client: HTTPCli
         pass
     try:
         resp = replicar_productos(data, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "replicar_productos_response",
             "usuario": data.usuario,
             "mensaje": resp.get("mensaje"),
         }))
         return resp
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "replicar_productos_error",
             "usuario": getattr(data, 'usuario', None),
             "detalle": str(e),
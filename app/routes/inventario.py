@@ -8,34 +8,59 @@ Provides query parameters to control emailing and output format.
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query, Request
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, Query
+from fastapi.responses import StreamingResponse
 
 # Logging utilities
-from app.logging_config import logger  # import only logger
-import json
-from typing import Optional
+from app.logging_config import _LazyJSON, logger
+from typing import Any, Dict, Iterator, Literal, Optional
 from app.clients.http_client import HTTPClient
+from app.routes.deps import get_http_client
 from app.services.inventario_service import totalizar_inventario
 
 
 router = APIRouter()
 
+# Productos por trozo al serializar la respuesta
+_CHUNK = 500
 
-def get_http_client(request: Request) -> HTTPClient:
-    return request.app.state.http_client
+
+def _json_totalizado(resp: Dict[str, Any]) -> Iterator[bytes]:
+    """Serializa ``{"total": n, "productos": [...]}`` por trozos.
+
+    Mismo JSON que antes, pero sin un único buffer con todo el inventario:
+    cada trozo de ``_CHUNK`` productos se serializa (orjson) y se envía.
+    Si el correo quedó en cola se añade ``"correo"`` al final.
+    """
+    productos = resp["productos"]
+    yield b'{"total":' + orjson.dumps(resp["total"]) + b',"productos":['
+    for i in range(0, len(productos), _CHUNK):
+        trozo = orjson.dumps(productos[i:i + _CHUNK])[1:-1]
+        yield (b"," + trozo) if i else trozo
+    if "correo" in resp:
+        yield b'],"correo":' + orjson.dumps(resp["correo"]) + b"}"
+    else:
+        yield b"]}"
 
 
 @router.get("/totalizar-inventario")
 def get_totalizar_inventario(
     usuario: str,
+    background_tasks: BackgroundTasks,
     enviar_por_correo: bool = Query(False),
     destinatario: Optional[str] = Query(None),
-    formato: str = Query("excel", regex="^(excel|pdf)$"),
+    formato: Literal["excel", "pdf"] = Query("excel"),
+    fresh: bool = Query(False, description="Si es true, ignora el inventario cacheado y lo vuelve a consultar."),
     http_client: HTTPClient = Depends(get_http_client),
-) -> dict:
-    """Totaliza el inventario del usuario y opcionalmente envía el reporte por correo."""
+) -> StreamingResponse:
+    """Totaliza el inventario del usuario y opcionalmente envía el reporte por correo.
+
+    El correo se envía en segundo plano: la respuesta sale en cuanto está el
+    totalizado, con 202 y ``"correo": {"estado": "en_cola", ...}``.
+    """
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "totalizar_inventario_request",
             "usuario": usuario,
             "enviar_por_correo": enviar_por_correo,
@@ -45,15 +70,22 @@ def get_totalizar_inventario(
     except Exception:
         pass
     try:
-        resp = totalizar_inventario(usuario, enviar_por_correo, destinatario, formato, http_client)
-        logger.info(json.dumps({
+        resp = totalizar_inventario(
+            usuario, enviar_por_correo, destinatario, formato, http_client,
+            fresh=fresh, background_tasks=background_tasks,
+        )
+        logger.info("%s", _LazyJSON({
             "event": "totalizar_inventario_response",
             "usuario": usuario,
             "total_productos": resp.get("total"),
         }))
-        return resp
+        return StreamingResponse(
+            _json_totalizado(resp),
+            status_code=202 if "correo" in resp else 200,
+            media_type="application/json",
+        )
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "totalizar_inventario_error",
             "usuario": usuario,
             "detalle": str(e),
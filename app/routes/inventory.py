@@ -10,18 +10,19 @@ Endpoints:
 
 from __future__ import annotations
 
-from typing import Optional, Literal, Dict, Any, List
+from typing import Optional, Literal, Dict, Any, Iterable, Iterator, List, Tuple
 from datetime import datetime
+from functools import lru_cache
 import io
 import csv
-from hashlib import sha1
+import numpy as np
 from fastapi import Query
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Response
 
 # Logging utilities
-from app.logging_config import logger  # import only logger; avoid decorator
-import json
-from app.core.http_sync import teco_request
+from app.logging_config import _LazyJSON, logger
+from app.utils.cache import cache
+from app.core.http_sync import teco_json, teco_pages, teco_request
 
 # Helpers y modelos del proyecto
 from .. import models
@@ -58,40 +59,54 @@ router = APIRouter()
 # Helpers genéricos JSON
 # =========================
 
-def _first_list_of_dicts(obj) -> List[dict]:
-    """Encuentra la primera lista de dicts dentro de un json arbitrario."""
-    if obj is None:
+# Envoltorios habituales de la lista de filas, por orden de preferencia
+_WRAPPER_KEYS = ("data", "items", "content", "records", "result", "rows")
+
+
+def _first_list_of_dicts(obj, max_depth: int = 4) -> List[dict]:
+    """Encuentra la primera lista de dicts dentro de un json arbitrario.
+
+    Las respuestas del API son homogéneas: basta mirar el primer elemento
+    de cada lista. No se desciende más de ``max_depth`` niveles.
+    """
+    if isinstance(obj, list):
+        return obj if obj and isinstance(obj[0], dict) else []
+    if not isinstance(obj, dict) or max_depth <= 0:
         return []
-    if isinstance(obj, list) and all(isinstance(x, dict) for x in obj):
-        return obj
-    if isinstance(obj, dict):
-        # prioriza envoltorios comunes
-        for k in ["data", "items", "content", "records", "result", "rows"]:
-            if k in obj:
-                lst = _first_list_of_dicts(obj[k])
-                if lst:
-                    return lst
-        # si no están, prueba cualquier valor
-        for v in obj.values():
-            lst = _first_list_of_dicts(v)
+    # prioriza envoltorios comunes
+    for k in _WRAPPER_KEYS:
+        v = obj.get(k)
+        if v is not None:
+            lst = _first_list_of_dicts(v, max_depth - 1)
             if lst:
                 return lst
+    # si no están, prueba el resto de valores contenedores
+    for k, v in obj.items():
+        if k in _WRAPPER_KEYS or not isinstance(v, (dict, list)):
+            continue
+        lst = _first_list_of_dicts(v, max_depth - 1)
+        if lst:
+            return lst
     return []
 
 
+@lru_cache(maxsize=256)
+def _path_parts(path: str) -> Tuple[str, ...]:
+    return tuple(path.split("."))
+
+
 def _get_first(d: dict, *paths, default=None):
     """Devuelve el primer valor no vacío siguiendo rutas 'a.b.c'."""
     for p in paths:
         cur = d
-        ok = True
-        for part in p.split("."):
+        for part in _path_parts(p):
             if isinstance(cur, dict) and part in cur:
                 cur = cur[part]
             else:
-                ok = False
                 break
-        if ok and cur not in (None, ""):
-            return cur
+        else:
+            if cur not in (None, ""):
+                return cur
     return default
 
 
@@ -122,8 +137,6 @@ def _parse_stock_rows(raw_json: dict | list) -> List[Dict[str, Any]]:
     else:
         rows = _first_list_of_dicts(raw_json)
 
-    items: List[Dict[str, Any]] = []
-
     # Mapeo opcional de medidas "técnicas" a legibles
     MEASURE_MAP = {
         "UNIT": "unid",
@@ -132,7 +145,19 @@ def _parse_stock_rows(raw_json: dict | list) -> List[Dict[str, Any]]:
         "KILOGRAM": "kg",
     }
 
-    for row in rows:
+    # 2) Cantidades en un array: el umbral ZERO_EPS se aplica de una vez.
+    #    Preferimos 'disponibility'; si no está, sumamos stocks[].quantity
+    def _cantidad(row: dict) -> float:
+        cantidad = row.get("disponibility", None)
+        if cantidad is None:
+            cantidad = sum(_safe_float(s.get("quantity", 0)) for s in (row.get("stocks") or []))
+        return _safe_float(cantidad)
+
+    cantidades = np.fromiter((_cantidad(row) for row in rows), dtype=np.float64, count=len(rows))
+    cantidades[np.abs(cantidades) < ZERO_EPS] = 0.0
+
+    items: List[Dict[str, Any]] = []
+    for row, cantidad in zip(rows, cantidades.tolist()):
         # nombre del producto
         nombre = _get_first(
             row,
@@ -141,14 +166,6 @@ def _parse_stock_rows(raw_json: dict | list) -> List[Dict[str, Any]]:
             default=None,
         ) or _get_first(row, "universalCode", "productId", default="SIN_NOMBRE")
 
-        # cantidad: preferimos 'disponibility'; si no está, sumamos stocks[].quantity
-        cantidad = row.get("disponibility", None)
-        if cantidad is None:
-            cantidad = sum(_safe_float(s.get("quantity", 0)) for s in (row.get("stocks") or []) )
-        cantidad = _safe_float(cantidad)
-        if abs(cantidad) < ZERO_EPS:
-            cantidad = 0.0
-
         # medida legible
         medida_raw = _get_first(row, "measure", "measureShortName", "uom", "unit", default="") or ""
         medida = MEASURE_MAP.get(str(medida_raw).upper(), str(medida_raw))
@@ -205,12 +222,16 @@ def _has_next_page(meta: Any, page: int) -> Optional[bool]:
     """
     Intenta inferir si existe siguiente página a partir de campos comunes.
     True/False si se puede inferir, None si no hay señal.
+    ``page`` es el número (base 1) con el que se pidió la página; se usa
+    cuando el cuerpo trae ``totalPages`` pero no su propio índice.
     """
     if isinstance(meta, dict):
         p = meta.get("page") or meta.get("number")
         total_pages = meta.get("totalPages") or meta.get("total_pages")
         if isinstance(p, int) and isinstance(total_pages, int):
             return p + 1 < total_pages
+        if isinstance(total_pages, int):
+            return page < total_pages
         if "hasNext" in meta:
             return bool(meta["hasNext"])
         if "last" in meta:
@@ -218,15 +239,18 @@ def _has_next_page(meta: Any, page: int) -> Optional[bool]:
     return None
 
 
-def _digest_page(items: List[dict]) -> Optional[str]:
+def _digest_page(items: List[dict]) -> Optional[int]:
     """
     Hash simple de una página para detectar contenido repetido
     cuando el backend ignora ?page=.
+    Solo se compara por igualdad con la página anterior: basta un hash de
+    64 bits sobre los campos que identifican cada fila, sin serializarla.
     """
     try:
-        subset = items[:50]
-        b = repr(subset).encode("utf-8", "ignore")
-        return sha1(b).hexdigest()
+        return hash(tuple(
+            (r.get("productId") or r.get("productName"), r.get("disponibility"))
+            for r in items[:50]
+        ))
     except Exception:
         return None
 
@@ -241,7 +265,7 @@ def listar_areas(usuario: str):
     """Return a list of stock areas for the current business and log the operation."""
     # Log inicio
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "listar_areas_request",
             "usuario": usuario,
         }))
@@ -257,10 +281,10 @@ def listar_areas(usuario: str):
     response = teco_request("GET", url, headers=headers, params=params)
     if response.status_code != 200:
         raise HTTPException(status_code=response.status_code, detail="Error al obtener las áreas")
-    items = response.json().get("items", [])
+    items = teco_json(response).get("items", [])
     result = [{"id": a["id"], "nombre": a["name"]} for a in items]
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "listar_areas_response",
             "usuario": usuario,
             "num_areas": len(result),
@@ -275,7 +299,7 @@ def listar_areas(usuario: str):
 def rendimiento_helado(data: models.RendimientoHeladoRequest):
     """Calculate efficiency metrics for ice cream production and log the operation."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "inventario_rendimiento_helado_request",
             "usuario": data.usuario,
             "area_nombre": data.area_nombre,
@@ -292,7 +316,7 @@ def rendimiento_helado(data: models.RendimientoHeladoRequest):
     response_areas = teco_request("GET", url_areas, headers=headers)
     if response_areas.status_code != 200:
         raise HTTPException(status_code=500, detail="No se pudieron obtener las áreas")
-    areas = response_areas.json().get("items", [])
+    areas = teco_json(response_areas).get("items", [])
     area = next((a for a in areas if a["name"] == data.area_nombre), None)
     if not area:
         raise HTTPException(status_code=404, detail="Área no encontrada")
@@ -304,7 +328,7 @@ def rendimiento_helado(data: models.RendimientoHeladoRequest):
     response_mov = teco_request("GET", movimientos_url, headers=headers)
     if response_mov.status_code != 200:
         raise HTTPException(status_code=500, detail="No se pudieron obtener los movimientos")
-    movimientos = response_mov.json().get("items", [])
+    movimientos = teco_json(response_mov).get("items", [])
     entradas = [m for m in movimientos if m["operation"] == "ENTRY"]
     salidas = [m for m in movimientos if m["operation"] == "OUT"]
     resultados: List[Dict[str, object]] = []
@@ -338,7 +362,7 @@ def rendimiento_helado(data: models.RendimientoHeladoRequest):
         "resumen": resultados,
     }
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "inventario_rendimiento_helado_response",
             "usuario": data.usuario,
             "num_resultados": len(resultados),
@@ -353,7 +377,7 @@ def rendimiento_helado(data: models.RendimientoHeladoRequest):
 def rendimiento_yogurt(data: models.RendimientoYogurtRequest):
     """Calculate efficiency metrics for yogurt production and log the operation."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "inventario_rendimiento_yogurt_request",
             "usuario": data.usuario,
             "area_nombre": data.area_nombre,
@@ -369,7 +393,7 @@ def rendimiento_yogurt(data: models.RendimientoYogurtRequest):
     res_areas = teco_request("GET", areas_url, headers=headers)
     if res_areas.status_code != 200:
         raise HTTPException(status_code=500, detail="No se pudieron obtener las áreas")
-    areas = res_areas.json().get("items", [])
+    areas = teco_json(res_areas).get("items", [])
     area = next((a for a in areas if a["name"] == data.area_nombre), None)
     if not area:
         raise HTTPException(status_code=404, detail="Área no encontrada")
@@ -381,7 +405,7 @@ def rendimiento_yogurt(data: models.RendimientoYogurtRequest):
     response_mov = teco_request("GET", movimientos_url, headers=headers)
     if response_mov.status_code != 200:
         raise HTTPException(status_code=500, detail="No se pudieron obtener los movimientos")
-    movimientos = response_mov.json().get("items", [])
+    movimientos = teco_json(response_mov).get("items", [])
     entradas = [m for m in movimientos if m["operation"] == "ENTRY"]
     salidas = [m for m in movimientos if m["operation"] == "OUT"]
     resultados: List[models.RendimientoYogurtResumen] = []
@@ -415,7 +439,7 @@ def rendimiento_yogurt(data: models.RendimientoYogurtRequest):
         resumen=resultados,
     )
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "inventario_rendimiento_yogurt_response",
             "usuario": data.usuario,
             "num_resultados": len(resultados),
@@ -429,10 +453,78 @@ def rendimiento_yogurt(data: models.RendimientoYogurtRequest):
 # TOTALIZAR INVENTARIO (MÍNIMO)
 # =========================
 
+# Vida de las filas de inventario cacheadas (segundos)
+INVENTORY_TTL = 180
+
+
+def _fetch_inventory(ctx: Dict[str, Any]) -> List[dict]:
+    """Descarga todas las filas de /report/stock/disponibility (paginación segura)."""
+    base_url = get_base_url(ctx["region"])
+    headers = get_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
+    url = f"{base_url}/api/v1/report/stock/disponibility"
+    filas: List[dict] = []
+    last_digest: Optional[int] = None
+    # varias páginas en vuelo, procesadas en orden
+    for page, resp in teco_pages(
+        lambda n: {"method": "GET", "url": url, "headers": headers, "params": {"page": n}},
+        max_pages=1000,
+    ):
+        if isinstance(resp, Exception):
+            raise HTTPException(status_code=502, detail=f"Error de red: {resp}")
+        if not (200 <= resp.status_code < 300):
+            raise HTTPException(status_code=resp.status_code, detail=resp.text or f"Error en página {page}")
+        js = teco_json(resp)
+        # Soporta estructura con { result: [...] }
+        rows = js["result"] if isinstance(js, dict) and isinstance(js.get("result"), list) else _first_list_of_dicts(js)
+        if not rows:
+            break
+        nxt = _has_next_page(js, page)
+        if nxt is None:
+            # Sin metadatos de paginación. Anti-loop: cortar si el backend ignora ?page=
+            dig = _digest_page(rows)
+            if last_digest is not None and dig == last_digest:
+                break
+            last_digest = dig
+        filas.extend(rows)
+        # El backend dice que es la última: no pedir otra tanda para verla vacía
+        if nxt is False:
+            break
+    return filas
+
+
+def _nombre_fila(r: dict) -> str:
+    return str(r.get("productName") or r.get("name") or r.get("universalCode") or r.get("productId") or "SIN_NOMBRE")
+
+
+def _disponibilidad_fila(r: dict) -> float:
+    """Cantidad de una fila: 'disponibility' o, si falta, la suma de stocks[].quantity."""
+    disp = r.get("disponibility", None)
+    if disp is not None:
+        return _safe_float(disp)
+    stocks = r.get("stocks") or []
+    # cada sumando ya pasó por _safe_float: la suma es float
+    return sum(_safe_float(s.get("quantity", 0)) for s in stocks) if isinstance(stocks, list) else 0.0
+
+
+def _load_inventory(ctx: Dict[str, Any], fresh: bool = False) -> List[dict]:
+    """Filas del inventario del negocio, cacheadas ``INVENTORY_TTL`` segundos.
+
+    Los errores no se cachean; ``fresh=True`` descarga de nuevo y renueva la entrada.
+    """
+    key = ("inventory_rows", ctx["region"], ctx["businessId"])
+    if fresh:
+        filas = _fetch_inventory(ctx)
+        cache.set(key, filas, INVENTORY_TTL)
+        return filas
+    return cache.get_or_set(key, lambda: _fetch_inventory(ctx), INVENTORY_TTL)
+
+
 @router.get("/totalizar-inventario")
 
 def totalizar_inventario(
     usuario: str,
+    background_tasks: BackgroundTasks,
+    response: Response,
     # Control de envío por correo
     enviar_por_correo: bool = Query(False, description="Si es true, genera y envía un archivo al correo indicado."),
     destinatario: Optional[str] = Query(None, description="Correo destino; obligatorio si enviar_por_correo=true."),
@@ -440,13 +532,15 @@ def totalizar_inventario(
     # Control de tamaño del JSON de respuesta
     incluir_productos: bool = Query(False, description="Si es true, incluye la lista de productos en el JSON."),
     max_items_json: int = Query(500, ge=0, le=10000, description="Máximo de productos a incluir en el JSON si incluir_productos=true."),
+    # Cache del inventario
+    fresh: bool = Query(False, description="Si es true, ignora el inventario cacheado y lo vuelve a consultar."),
 ):
     """
     Calcula el total de inventario y opcionalmente envía el resultado por correo. Registra eventos de inicio y finalización.
     """
     # Log inicio
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "inventario_totalizar_request",
             "usuario": usuario,
             "enviar_por_correo": enviar_por_correo,
@@ -457,68 +551,33 @@ def totalizar_inventario(
         }))
     except Exception:
         pass
-    # 1) Autenticación + headers
+    # 1) Autenticación
     ctx = user_context.get(usuario)
     if not ctx:
         raise HTTPException(status_code=403, detail="Usuario no autenticado")
-    base_url = get_base_url(ctx["region"])
-    headers = get_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
-    url = f"{base_url}/api/v1/report/stock/disponibility"
+    # 2) Filas del inventario (cacheadas por negocio; ``fresh`` fuerza recarga)
+    filas = _load_inventory(ctx, fresh=fresh)
+    # 3) Cantidades y costos en arrays: umbral, filtro y sumas en NumPy.
+    #    total_cost es para el JSON; nunca se imprime en PDF/Excel
+    disp = np.fromiter((_disponibilidad_fila(r) for r in filas), dtype=np.float64, count=len(filas))
+    disp[np.abs(disp) < ZERO_EPS] = 0.0
+    # Solo cuentan productos con disponibilidad > 0 real
+    mask = disp > ZERO_EPS
+    con_stock = np.flatnonzero(mask).tolist()
+    # total_cost solo se convierte en las filas con stock
+    cost = np.fromiter((_safe_float(filas[i].get("total_cost", 0)) for i in con_stock), dtype=np.float64, count=len(con_stock))
+    total_items_contados = len(con_stock)
+    suma_disponibilidad = float(disp[mask].sum())
+    suma_total_cost = float(cost.sum())
+    # Solo armamos la lista si luego el JSON la va a devolver (SOLO los 3 campos)
     productos: List[Dict[str, Any]] = []
-    # 2) Paginación segura
-    page = 1
-    last_digest: Optional[str] = None
-    MAX_PAGES = 1000
-    total_items_contados = 0
-    suma_disponibilidad = 0.0
-    suma_total_cost = 0.0
-    while page <= MAX_PAGES:
-        try:
-            resp = teco_request("GET", url, headers=headers, params={"page": page})
-        except Exception as e:
-            raise HTTPException(status_code=502, detail=f"Error de red: {e}")
-        if not (200 <= resp.status_code < 300):
-            raise HTTPException(status_code=resp.status_code, detail=resp.text or f"Error en página {page}")
-        js = resp.json()
-        # Soporta estructura con { result: [...] }
-        rows = js["result"] if isinstance(js, dict) and isinstance(js.get("result"), list) else _first_list_of_dicts(js)
-        if not rows:
-            break
-        # Anti-loop: cortar si el backend ignora ?page=
-        dig = sha1(repr(rows[:50]).encode("utf-8", "ignore")).hexdigest()
-        if last_digest is not None and dig == last_digest:
-            break
-        last_digest = dig
-        # 3) Normalizar SOLO los 3 campos pedidos (por PRODUCTO)
-        for r in rows:
-            name = r.get("productName") or r.get("name") or r.get("universalCode") or r.get("productId") or "SIN_NOMBRE"
-            # cantidad: preferimos 'disponibility'; si falta, sumamos stocks[].quantity
-            disp = r.get("disponibility", None)
-            if disp is None:
-                stocks = r.get("stocks") or []
-                if isinstance(stocks, list):
-                    disp = sum(_safe_float(s.get("quantity", 0)) for s in stocks)
-                else:
-                    disp = 0.0
-            disp = _safe_float(disp)
-            if abs(disp) < ZERO_EPS:
-                disp = 0.0
-            # total_cost (para JSON; nunca se imprime en PDF/Excel)
-            tcost = _safe_float(r.get("total_cost", 0))
-            # Guardar solo productos con disponibilidad > 0 real
-            if disp > ZERO_EPS:
-                total_items_contados += 1
-                suma_disponibilidad += disp
-                suma_total_cost += tcost
-                # Solo acumulamos en la lista si luego el JSON lo va a devolver
-                if incluir_productos and len(productos) < max_items_json:
-                    productos.append({
-                        "productName": str(name),
-                        "disponibility": disp,
-                        "total_cost": tcost,
-                    })
-
-        page += 1
+    if incluir_productos:
+        for j, i in enumerate(con_stock[:max_items_json]):
+            productos.append({
+                "productName": _nombre_fila(filas[i]),
+                "disponibility": float(disp[i]),
+                "total_cost": float(cost[j]),
+            })
 
     # 4) Resumen (el JSON mantiene costo_total; los archivos NO lo muestran)
     payload = {
@@ -547,35 +606,25 @@ def totalizar_inventario(
         if not destinatario:
             raise HTTPException(status_code=400, detail="destinatario es obligatorio cuando enviar_por_correo=true")
 
-        try:
-            if formato == "pdf":
-                # PDF **sin costos** SIEMPRE (regla del negocio)
-                data_bytes, filename, mime = _generar_pdf_sin_costos_cantidades(productos_full_needed=True, usuario=usuario)
-            else:
-                # Excel **sin costos** (solo cantidades generales)
-                data_bytes, filename, mime = _generar_excel_sin_costos_cantidades(productos_full_needed=True, usuario=usuario)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"No se pudo generar el archivo: {e}")
-
-        try:
-            enviar_correo(
-                to_email=destinatario,
-                subject="Totalizar inventario",
-                body_text="Adjunto el reporte solicitado (sin costos, solo cantidades generales).",
-                attachment=(data_bytes, filename, mime),
-            )
-            payload["archivo_enviado"] = {
-                "nombre": filename,
-                "formato": formato,
-                "destinatario": destinatario,
-                "fecha_envio": datetime.utcnow().isoformat() + "Z",
-            }
-        except Exception as e:
-            raise HTTPException(status_code=502, detail=f"No se pudo enviar el correo: {e}")
+        # El archivo reutiliza las cantidades ya calculadas en el paso 3
+        # en vez de recorrer y convertir las filas otra vez
+        productos_archivo = (
+            {"productName": _nombre_fila(filas[i]), "disponibility": float(disp[i])}
+            for i in con_stock
+        )
+        # Generar el archivo y enviarlo tarda segundos: se hace después de
+        # responder, con el resumen ya calculado
+        background_tasks.add_task(_enviar_totalizado, usuario, destinatario, formato, productos_archivo)
+        payload["archivo_enviado"] = {
+            "estado": "en_cola",
+            "formato": formato,
+            "destinatario": destinatario,
+        }
+        response.status_code = 202
 
     # Registrar finalización del proceso
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "inventario_totalizar_response",
             "usuario": usuario,
             "items": total_items_contados,
@@ -588,86 +637,130 @@ def totalizar_inventario(
         pass
     return payload
 
-def _recopilar_productos_completos(usuario: str) -> List[Dict[str, Any]]:
-    """Lee TODO el inventario disponible (>0) solo con productName y disponibility."""
+def _enviar_totalizado(
+    usuario: str,
+    destinatario: str,
+    formato: str,
+    productos: Iterable[Dict[str, Any]],
+) -> None:
+    """Genera el archivo sin costos y lo envía por correo (tarea en segundo plano).
+
+    La respuesta ya salió, así que los fallos solo se registran.
+    """
+    try:
+        if formato == "pdf":
+            # PDF **sin costos** SIEMPRE (regla del negocio)
+            data_bytes, filename, mime = _generar_pdf_sin_costos_cantidades(
+                productos_full_needed=True, usuario=usuario, productos=productos,
+            )
+        else:
+            # Excel **sin costos** (solo cantidades generales)
+            data_bytes, filename, mime = _generar_excel_sin_costos_cantidades(
+                productos_full_needed=True, usuario=usuario, productos=productos,
+            )
+        enviar_correo(
+            to_email=destinatario,
+            subject="Totalizar inventario",
+            body_text="Adjunto el reporte solicitado (sin costos, solo cantidades generales).",
+            attachment=(data_bytes, filename, mime),
+        )
+    except Exception as e:
+        logger.error("%s", _LazyJSON({
+            "event": "inventario_totalizar_correo_error",
+            "usuario": usuario,
+            "formato": formato,
+            "detalle": str(e),
+        }), exc_info=True)
+        return
+    logger.info("%s", _LazyJSON({
+        "event": "inventario_totalizar_correo_enviado",
+        "usuario": usuario,
+        "nombre": filename,
+        "formato": formato,
+        "fecha_envio": datetime.utcnow().isoformat() + "Z",
+    }))
+
+def _iter_products(usuario: str) -> Iterator[Dict[str, Any]]:
+    """Recorre TODO el inventario disponible (>0) solo con productName y disponibility.
+
+    Usa las filas cacheadas por ``_load_inventory``: tras ``totalizar_inventario``
+    el export no vuelve a descargar el inventario. Es un generador, así los
+    exports escriben fila a fila sin armar una segunda lista de productos.
+    """
     ctx = user_context.get(usuario)
     if not ctx:
         raise RuntimeError("Usuario no autenticado en recopilación")
-    base_url = get_base_url(ctx["region"])
-    headers = get_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
-    url = f"{base_url}/api/v1/report/stock/disponibility"
 
-    productos_full: List[Dict[str, Any]] = []
-    page, last_digest = 1, None
-    while page <= 1000:
-        resp = teco_request("GET", url, headers=headers, params={"page": page})
-        if not (200 <= resp.status_code < 300):
-            raise RuntimeError(f"Error recopilando inventario (página {page}): {resp.text}")
-        js = resp.json()
-        rows = js["result"] if isinstance(js, dict) and isinstance(js.get("result"), list) else _first_list_of_dicts(js)
-        if not rows:
-            break
-        dig = sha1(repr(rows[:50]).encode("utf-8", "ignore")).hexdigest()
-        if last_digest is not None and dig == last_digest:
-            break
-        last_digest = dig
-        for r in rows:
-            name = r.get("productName") or r.get("name") or r.get("universalCode") or r.get("productId") or "SIN_NOMBRE"
-            disp = r.get("disponibility", None)
-            if disp is None:
-                stocks = r.get("stocks") or []
-                disp = sum(_safe_float(s.get("quantity", 0)) for s in stocks) if isinstance(stocks, list) else 0.0
-            disp = _safe_float(disp)
-            if disp > ZERO_EPS:
-                productos_full.append({"productName": str(name), "disponibility": disp})
-        page += 1
-    return productos_full
-
-def _generar_pdf_sin_costos_cantidades(productos_full_needed: bool, usuario: str):
+    for r in _load_inventory(ctx):
+        disp = _disponibilidad_fila(r)
+        if disp > ZERO_EPS:
+            yield {"productName": _nombre_fila(r), "disponibility": disp}
+
+def _generar_pdf_sin_costos_cantidades(
+    productos_full_needed: bool,
+    usuario: str,
+    productos: Optional[Iterable[Dict[str, Any]]] = None,
+):
     """
     Genera un PDF SIN costos: solo 'Producto' y 'Disponibilidad'.
-    Si productos_full_needed=True, lee todos los productos del backend.
+    Si productos_full_needed=True, lee todos los productos del backend,
+    salvo que ``productos`` ya los traiga (p.ej. desde totalizar_inventario).
     """
     if not REPORTLAB_AVAILABLE:
         raise RuntimeError("ReportLab no está disponible para generar PDF.")
-    productos_full = _recopilar_productos_completos(usuario) if productos_full_needed else []
+    if productos is None:
+        productos = _iter_products(usuario) if productos_full_needed else iter(())
     import io
     from reportlab.pdfgen import canvas
     from reportlab.lib.pagesizes import A4
 
-    total_items = len(productos_full)
-    total_disp = sum(_safe_float(p["disponibility"]) for p in productos_full)
-
     buf = io.BytesIO()
     c = canvas.Canvas(buf, pagesize=A4)
     w, h = A4
     y = h - 50
 
     c.drawString(40, y, "Totalizar Inventario (sin costos)"); y -= 20
-    c.drawString(40, y, f"Items: {total_items}"); y -= 20
-    c.drawString(40, y, f"Disponibilidad Total: {round(total_disp, 6)}"); y -= 30
+    # Los totales se conocen al terminar el recorrido: se dibujan en un
+    # form que ReportLab resuelve al guardar el documento.
+    c.doForm("totales"); y_totales = y; y -= 50
 
     c.drawString(40, y, "Producto | Disponibilidad"); y -= 18
 
-    for p in productos_full[:5000]:  # límite de filas por seguridad
+    total_items = 0
+    total_disp = 0.0
+    for p in productos:
+        total_items += 1
+        total_disp += p["disponibility"]
+        if total_items > 5000:  # límite de filas por seguridad
+            continue
         line = f"{p['productName']} | {p['disponibility']}"
         c.drawString(40, y, line); y -= 14
         if y < 60:
             c.showPage(); y = h - 50
 
+    c.beginForm("totales")
+    c.drawString(40, y_totales, f"Items: {total_items}")
+    c.drawString(40, y_totales - 20, f"Disponibilidad Total: {round(total_disp, 6)}")
+    c.endForm()
     c.save()
     buf.seek(0)
     return buf.read(), "totalizar-inventario.pdf", "application/pdf"
 
-def _generar_excel_sin_costos_cantidades(productos_full_needed: bool, usuario: str):
+def _generar_excel_sin_costos_cantidades(
+    productos_full_needed: bool,
+    usuario: str,
+    productos: Optional[Iterable[Dict[str, Any]]] = None,
+):
     """
     Genera un Excel SIN costos:
       - Hoja 'Inventario' con columnas: Producto, Disponibilidad
       - Hoja 'Resumen' con Items y Disponibilidad Total
+    ``productos``, si se pasa, reemplaza la lectura de ``_iter_products``.
     """
     if not OPENPYXL_AVAILABLE:
         raise RuntimeError("openpyxl no está disponible para generar Excel.")
-    productos_full = _recopilar_productos_completos(usuario) if productos_full_needed else []
+    if productos is None:
+        productos = _iter_products(usuario) if productos_full_needed else iter(())
 
     import io
     from openpyxl import Workbook
@@ -676,12 +769,16 @@ def _generar_excel_sin_costos_cantidades(productos_full_needed: bool, usuario: s
     ws = wb.active
     ws.title = "Inventario"
     ws.append(["Producto", "Disponibilidad"])
-    for p in productos_full:
+    total_items = 0
+    total_disp = 0.0
+    for p in productos:
         ws.append([p["productName"], p["disponibility"]])
+        total_items += 1
+        total_disp += p["disponibility"]
 
     ws2 = wb.create_sheet("Resumen")
     ws2.append(["Items", "Disponibilidad Total"])
-    ws2.append([len(productos_full), round(sum(_safe_float(x["disponibility"]) for x in productos_full), 6)])
+    ws2.append([total_items, round(total_disp, 6)])
 
     bio = io.BytesIO()
     wb.save(bio)
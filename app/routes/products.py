@@ -9,13 +9,14 @@ original API contracts.
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException
 
 # Logger y utilidades de logging
-from app.logging_config import logger  # import logger only; decorators removed
-import json
+from app.logging_config import _LazyJSON, logger
 
 from app.clients.http_client import HTTPClient
+from app.routes.deps import get_http_client
+from app.core.routing import ORJSONRoute
 from app.schemas.products import Producto, EntradaInteligenteRequest
 from app.services.product_service import (
     crear_producto_con_categoria,
@@ -23,11 +24,8 @@ from app.services.product_service import (
     crear_productos_teco_batch,   # <-- NUEVO: batch cliente
 )
 
-router = APIRouter()
-
-
-def get_http_client(request: Request) -> HTTPClient:
-    return request.app.state.http_client
+# cuerpos con listas largas de productos: JSON decodificado con orjson
+router = APIRouter(route_class=ORJSONRoute)
 
 
 @router.post("/crear-producto-con-categoria")
@@ -43,7 +41,7 @@ def post_crear_producto_con_categoria(payload: dict, http_client: HTTPClient = D
         raise HTTPException(status_code=422, detail="Falta 'usuario'.")
     items = payload.get("items")
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "crear_producto_con_categoria_request",
             "usuario": usuario,
             "modo": "batch" if isinstance(items, list) else "single",
@@ -55,7 +53,7 @@ def post_crear_producto_con_categoria(payload: dict, http_client: HTTPClient = D
     if isinstance(items, list):
         try:
             resultado = crear_productos_teco_batch(usuario, items, http_client)
-            logger.info(json.dumps({
+            logger.info("%s", _LazyJSON({
                 "event": "crear_producto_con_categoria_response",
                 "usuario": usuario,
                 "modo": "batch",
@@ -63,7 +61,7 @@ def post_crear_producto_con_categoria(payload: dict, http_client: HTTPClient = D
             }))
             return resultado
         except Exception as e:
-            logger.error(json.dumps({
+            logger.error("%s", _LazyJSON({
                 "event": "crear_producto_con_categoria_error",
                 "usuario": usuario,
                 "detalle": str(e),
@@ -84,7 +82,7 @@ def post_crear_producto_con_categoria(payload: dict, http_client: HTTPClient = D
     )
     try:
         respuesta = crear_producto_con_categoria(data, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "crear_producto_con_categoria_response",
             "usuario": usuario,
             "modo": "single",
@@ -93,7 +91,7 @@ def post_crear_producto_con_categoria(payload: dict, http_client: HTTPClient = D
         return respuesta
     except Exception as e:
         # el servicio ya registra detalles; aquí solo anotamos la excepción
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "crear_producto_con_categoria_error",
             "usuario": usuario,
             "modo": "single",
@@ -110,7 +108,7 @@ def post_entrada_inteligente(data: EntradaInteligenteRequest, http_client: HTTPC
     productos se procesaron y si se solicitó la selección de área de stock.
     """
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "entrada_inteligente_request",
             "usuario": data.usuario,
             "stockAreaId": data.stockAreaId,
@@ -126,14 +124,14 @@ def post_entrada_inteligente(data: EntradaInteligenteRequest, http_client: HTTPC
             "mensaje": respuesta.get("mensaje"),
             "productos_procesados": len(respuesta.get("productos_procesados", [])) if isinstance(respuesta.get("productos_procesados"), list) else None,
         }
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "entrada_inteligente_response",
             "usuario": data.usuario,
             **resumen,
         }))
         return respuesta
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "entrada_inteligente_error",
             "usuario": getattr(data, 'usuario', None),
             "detalle": str(e),
@@ -9,12 +9,12 @@ structured responses.
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends
 
 # Logging utilities
-from app.logging_config import logger  # import only logger
-import json
+from app.logging_config import _LazyJSON, logger
 from app.clients.http_client import HTTPClient
+from app.routes.deps import get_http_client
 from app.schemas.rendimiento import (
     RendimientoHeladoRequest,
     RendimientoYogurtRequest,
@@ -26,16 +26,12 @@ from app.services.rendimiento_service import rendimiento_helado, rendimiento_yog
 router = APIRouter()
 
 
-def get_http_client(request: Request) -> HTTPClient:
-    return request.app.state.http_client
-
-
 @router.post("/rendimiento-helado")
 
 def post_rendimiento_helado(data: RendimientoHeladoRequest, http_client: HTTPClient = Depends(get_http_client)):
     """Calcula el rendimiento de producción de helado. Registra eventos de inicio y fin."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "rendimiento_helado_request",
             "usuario": data.usuario,
             "area_id": data.area_id,
@@ -45,13 +41,13 @@ def post_rendimiento_helado(data: RendimientoHeladoRequest, http_client: HTTPCli
         pass
     try:
         resp = rendimiento_helado(data, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "rendimiento_helado_response",
             "usuario": data.usuario,
         }))
         return resp
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "rendimiento_helado_error",
             "usuario": getattr(data, 'usuario', None),
             "detalle": str(e),
@@ -64,7 +60,7 @@ def post_rendimiento_helado(data: RendimientoHeladoRequest, http_client: HTTPCli
 def post_rendimiento_yogurt(data: RendimientoYogurtRequest, http_client: HTTPClient = Depends(get_http_client)):
     """Calcula el rendimiento de yogurt y registra eventos de inicio y fin."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "rendimiento_yogurt_request",
             "usuario": data.usuario,
             "area_id": data.area_id,
@@ -75,13 +71,13 @@ def post_rendimiento_yogurt(data: RendimientoYogurtRequest, http_client: HTTPCli
         pass
     try:
         resp = rendimiento_yogurt(data, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "rendimiento_yogurt_response",
             "usuario": data.usuario,
         }))
         return resp
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "rendimiento_yogurt_error",
             "usuario": getattr(data, 'usuario', None),
             "detalle": str(e),
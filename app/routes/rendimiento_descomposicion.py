@@ -3,8 +3,7 @@ from __future__ import annotations
 from fastapi import APIRouter
 
 # Logging utilities
-from app.logging_config import logger  # import only logger
-import json
+from app.logging_config import _LazyJSON, logger
 from app.schemas.rendimiento_descomposicion import (
     RendimientoDescomposicionBody,
     RendimientoDescomposicionResponse,
@@ -25,7 +24,7 @@ def rendimiento_descomposicion_post(
     Registra eventos de entrada y salida para trazabilidad.
     """
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "rendimiento_descomposicion_request",
             "usuario": payload.usuario,
             "area_id": payload.area_id,
@@ -38,13 +37,13 @@ def rendimiento_descomposicion_post(
         pass
     try:
         result = rendimiento_descomposicion_service(body=payload.model_dump(by_alias=True))
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "rendimiento_descomposicion_response",
             "usuario": payload.usuario,
         }))
         return RendimientoDescomposicionResponse(**result)
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "rendimiento_descomposicion_error",
             "usuario": getattr(payload, 'usuario', None),
             "detalle": str(e),
@@ -10,14 +10,14 @@ structures align with the original specification.
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Body, Query, Request
+from fastapi import APIRouter, Depends, Body, Query
 
 # Logging utilities
-from app.logging_config import logger  # import only logger
-import json
+from app.logging_config import _LazyJSON, logger
 from typing import Dict, Any
 
 from app.clients.http_client import HTTPClient
+from app.routes.deps import get_http_client
 from app.schemas.reports import (
     ReporteVentasRequest,
     QuiebreRequest,
@@ -40,16 +40,12 @@ from app.services.report_service import (
 router = APIRouter()
 
 
-def get_http_client(request: Request) -> HTTPClient:
-    return request.app.state.http_client
-
-
 @router.post("/reporte-ventas")
 
 def post_reporte_ventas(data: ReporteVentasRequest, http_client: HTTPClient = Depends(get_http_client)):
     """Devuelve el reporte de ventas para un rango de fechas. Registra eventos de inicio y finalización."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "reporte_ventas_request",
             "usuario": data.usuario,
             "fecha_inicio": str(data.fecha_inicio),
@@ -59,14 +55,14 @@ def post_reporte_ventas(data: ReporteVentasRequest, http_client: HTTPClient = De
         pass
     try:
         resp = reporte_ventas(data, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "reporte_ventas_response",
             "usuario": data.usuario,
             "num_productos": len(resp.get("productos", [])) if isinstance(resp.get("productos"), list) else None,
         }))
         return resp
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "reporte_ventas_error",
             "usuario": getattr(data, 'usuario', None),
             "detalle": str(e),
@@ -79,7 +75,7 @@ def post_reporte_ventas(data: ReporteVentasRequest, http_client: HTTPClient = De
 def post_reporte_quiebre_stock(request_body: QuiebreRequest, http_client: HTTPClient = Depends(get_http_client)):
     """Realiza un análisis de quiebre de stock. Registra eventos de inicio y finalización."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "reporte_quiebre_stock_request",
             "usuario": request_body.usuario,
             "fecha_inicio": request_body.fecha_inicio,
@@ -90,14 +86,14 @@ def post_reporte_quiebre_stock(request_body: QuiebreRequest, http_client: HTTPCl
         pass
     try:
         resp = reporte_quiebre_stock(request_body, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "reporte_quiebre_stock_response",
             "usuario": request_body.usuario,
             "status": resp.get("status"),
         }))
         return resp
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "reporte_quiebre_stock_error",
             "usuario": getattr(request_body, 'usuario', None),
             "detalle": str(e),
@@ -110,7 +106,7 @@ def post_reporte_quiebre_stock(request_body: QuiebreRequest, http_client: HTTPCl
 def post_analisis_desempeno(data: AnalisisDesempenoRequest, http_client: HTTPClient = Depends(get_http_client)):
     """Realiza un análisis de desempeño de ventas y registra eventos para observabilidad."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "analisis_desempeno_request",
             "usuario": data.usuario,
             "fecha_inicio": str(data.fecha_inicio),
@@ -120,14 +116,14 @@ def post_analisis_desempeno(data: AnalisisDesempenoRequest, http_client: HTTPCli
         pass
     try:
         resp = analisis_desempeno(data, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "analisis_desempeno_response",
             "usuario": data.usuario,
             "status": resp.get("status"),
         }))
         return resp
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "analisis_desempeno_error",
             "usuario": getattr(data, 'usuario', None),
             "detalle": str(e),
@@ -143,7 +139,7 @@ def post_ventas_diarias(data: Dict[str, Any] = Body(...), http_client: HTTPClien
     fecha_inicio = data.get("fecha_inicio")
     fecha_fin = data.get("fecha_fin")
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "ventas_diarias_request",
             "usuario": usuario,
             "fecha_inicio": fecha_inicio,
@@ -153,14 +149,14 @@ def post_ventas_diarias(data: Dict[str, Any] = Body(...), http_client: HTTPClien
         pass
     try:
         resp = ventas_diarias(data, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "ventas_diarias_response",
             "usuario": usuario,
             "total_dias": resp.get("total_dias"),
         }))
         return resp
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "ventas_diarias_error",
             "usuario": usuario,
             "detalle": str(e),
@@ -173,12 +169,12 @@ def post_ventas_diarias(data: Dict[str, Any] = Body(...), http_client: HTTPClien
 def get_tipos_negocio():
     """Devuelve la lista de tipos de negocio y registra evento."""
     try:
-        logger.info(json.dumps({"event": "tipos_negocio_request"}))
+        logger.info("%s", _LazyJSON({"event": "tipos_negocio_request"}))
     except Exception:
         pass
     resp = obtener_tipos_negocio()
     try:
-        logger.info(json.dumps({"event": "tipos_negocio_response", "num_tipos": len(resp.get("tipos_negocio", []))}))
+        logger.info("%s", _LazyJSON({"event": "tipos_negocio_response", "num_tipos": len(resp.get("tipos_negocio", []))}))
     except Exception:
         pass
     return resp
@@ -194,7 +190,7 @@ def post_proyeccion_ventas(
 ):
     """Calcula proyecciones de ventas y registra eventos."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "proyeccion_ventas_request",
             "usuario": usuario,
             "tipo_negocio": tipo_negocio,
@@ -204,14 +200,14 @@ def post_proyeccion_ventas(
         pass
     try:
         resp = proyeccion_ventas(usuario, tipo_negocio, fecha_base, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "proyeccion_ventas_response",
             "usuario": usuario,
             "status": resp.get("status"),
         }))
         return resp
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "proyeccion_ventas_error",
             "usuario": usuario,
             "detalle": str(e),
@@ -224,7 +220,7 @@ def post_proyeccion_ventas(
 def post_reporte_ventas_global(data: ReporteGlobalRequest, http_client: HTTPClient = Depends(get_http_client)):
     """Devuelve métricas de ventas globales consolidando todas las sucursales. Registra eventos."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "reporte_ventas_global_request",
             "usuario": data.usuario,
             "fecha_inicio": str(data.fecha_inicio),
@@ -234,13 +230,13 @@ def post_reporte_ventas_global(data: ReporteGlobalRequest, http_client: HTTPClie
         pass
     try:
         resp = reporte_ventas_global(data, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "reporte_ventas_global_response",
             "usuario": data.usuario,
         }))
         return resp
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "reporte_ventas_global_error",
             "usuario": getattr(data, 'usuario', None),
             "detalle": str(e),
@@ -258,7 +254,7 @@ def get_comparativa_semanal(
 ):
     """Compara ventas por día a través de varias semanas y registra eventos."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "comparativa_semanal_request",
             "usuario": usuario,
             "fecha_inicio": fecha_inicio,
@@ -268,13 +264,13 @@ def get_comparativa_semanal(
         pass
     try:
         resp = comparativa_semanal(usuario, fecha_inicio, semanas, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "comparativa_semanal_response",
             "usuario": usuario,
         }))
         return resp
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "comparativa_semanal_error",
             "usuario": usuario,
             "detalle": str(e),
@@ -287,7 +283,7 @@ def get_comparativa_semanal(
 def post_ticket_promedio(data: RangoFechasConHora = Body(...), http_client: HTTPClient = Depends(get_http_client)):
     """Calcula el ticket promedio entre dos fechas y registra eventos."""
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "ticket_promedio_request",
             "usuario": data.usuario,
             "fecha_inicio": str(data.fecha_inicio),
@@ -297,13 +293,13 @@ def post_ticket_promedio(data: RangoFechasConHora = Body(...), http_client: HTTP
         pass
     try:
         resp = ticket_promedio(data, http_client)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "ticket_promedio_response",
             "usuario": data.usuario,
         }))
         return resp
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "ticket_promedio_error",
             "usuario": getattr(data, 'usuario', None),
             "detalle": str(e),
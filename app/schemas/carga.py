@@ -12,7 +12,7 @@ from __future__ import annotations
 
 from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class Cost(BaseModel):
@@ -21,6 +21,9 @@ class Cost(BaseModel):
 
 
 class ProductoCarga(BaseModel):
+    # elementos de listas largas que nunca se modifican tras validarse
+    model_config = ConfigDict(frozen=True)
+
     name: str
     code: str
     price: float
@@ -44,6 +47,8 @@ class CrearCargaConProductosRequest(BaseModel):
 
 
 class ProductoEntradaCarga(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str
     price: float
     codeCurrency: str
@@ -63,6 +68,21 @@ class VerificarProductosRequest(BaseModel):
     usuario: str
     nombres_productos: List[str]
 
+    @field_validator("nombres_productos")
+    @classmethod
+    def deduplicar_nombres(cls, v: List[str]) -> List[str]:
+        # La búsqueda en Tecopos no distingue mayúsculas: un nombre repetido
+        # (o vacío) solo costaría otra llamada. Se conserva la primera forma.
+        vistos: set = set()
+        unicos: List[str] = []
+        for nombre in v:
+            nombre = nombre.strip()
+            clave = nombre.lower()
+            if nombre and clave not in vistos:
+                vistos.add(clave)
+                unicos.append(nombre)
+        return unicos
+
 
 class ProductosFaltantesResponse(BaseModel):
     productos_faltantes: List[str]
\ No newline at end of file
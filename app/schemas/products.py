@@ -11,7 +11,7 @@ basic sanity checks on incoming data.
 from __future__ import annotations
 
 from typing import List, Optional
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class Producto(BaseModel):
@@ -25,6 +25,8 @@ class Producto(BaseModel):
 
 
 class ProductoEntradaInteligente(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     nombre: str
     cantidad: int
     precio: float
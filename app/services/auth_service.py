@@ -14,9 +14,9 @@ from typing import Any, Dict
 from fastapi import HTTPException
 
 from app.clients.http_client import HTTPClient
-from app.logging_config import logger, log_call
-import json
-from app.core.auth import get_base_url, get_origin_url, build_auth_headers
+from app.core.http_sync import teco_batch
+from app.logging_config import _LazyJSON, logger, log_call
+from app.core.auth import get_base_url, build_base_headers
 from app.core.context import set_user_context, get_user_context
 from app.schemas.auth import LoginData, SeleccionNegocio
 
@@ -40,7 +40,7 @@ def login_user(data: LoginData, http_client: HTTPClient) -> Dict[str, Any]:
     region = data.region
     # Registramos la intención de login a nivel INFO para trazabilidad
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "login_start",
             "usuario": username,
             "region": region,
@@ -49,20 +49,12 @@ def login_user(data: LoginData, http_client: HTTPClient) -> Dict[str, Any]:
     except Exception:
         pass
     base_url = get_base_url(region)
-    origin = get_origin_url(region)
 
     login_url = f"{base_url}/api/v1/security/login"
     userinfo_url = f"{base_url}/api/v1/security/user"
     branches_url = f"{base_url}/api/v1/administration/my-branches"
 
-    headers: Dict[str, str] = {
-        "Content-Type": "application/json",
-        "Accept": "*/*",
-        "Origin": origin,
-        "Referer": f"{origin}/",
-        "x-app-origin": "Tecopos-Admin",
-        "User-Agent": "Mozilla/5.0",
-    }
+    headers: Dict[str, str] = build_base_headers(region)
 
     # 🔹 LOGIN CON username
     try:
@@ -72,14 +64,14 @@ def login_user(data: LoginData, http_client: HTTPClient) -> Dict[str, Any]:
         })  # CHANGED: use http_client for pooling & timeout
     except Exception as e:
         # error network-level
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "login_error",
             "usuario": username,
             "detalle": str(e),
         }), exc_info=True)
         raise
     if res.status_code != 200:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "login_failed",
             "usuario": username,
             "status_code": res.status_code,
@@ -88,7 +80,7 @@ def login_user(data: LoginData, http_client: HTTPClient) -> Dict[str, Any]:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
     token = res.json().get("token")
     if not token:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "login_error",
             "usuario": username,
             "detalle": "Token no proporcionado en respuesta de login",
@@ -98,10 +90,15 @@ def login_user(data: LoginData, http_client: HTTPClient) -> Dict[str, Any]:
     # include token for subsequent calls
     headers["Authorization"] = f"Bearer {token}"
 
+    # userinfo y sucursales solo dependen del token: se piden en paralelo
+    info_res, branches_res = teco_batch([
+        {"method": "GET", "url": userinfo_url, "headers": headers},
+        {"method": "GET", "url": branches_url, "headers": headers},
+    ], send=http_client.request)
+
     # 🔹 OBTENER businessId REAL
-    info_res = http_client.request("GET", userinfo_url, headers=headers)
     if info_res.status_code != 200:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "login_error",
             "usuario": username,
             "detalle": "No se pudo obtener la información del usuario",
@@ -109,7 +106,7 @@ def login_user(data: LoginData, http_client: HTTPClient) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail="No se pudo obtener la información del usuario")
     business_id = info_res.json().get("businessId")
     if not business_id:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "login_error",
             "usuario": username,
             "detalle": "No se pudo obtener businessId del usuario",
@@ -123,9 +120,8 @@ def login_user(data: LoginData, http_client: HTTPClient) -> Dict[str, Any]:
         "region": region,
     }
     # 🔹 VERIFICAR SUCURSALES
-    branches_res = http_client.request("GET", branches_url, headers=headers)
     if branches_res.status_code != 200:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "login_error",
             "usuario": username,
             "detalle": "Error al obtener las sucursales del usuario",
@@ -137,7 +133,7 @@ def login_user(data: LoginData, http_client: HTTPClient) -> Dict[str, Any]:
         # single branch – set context and return
         set_user_context(username, context)
         # Logging de éxito de login con sucursal única
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "login_success",
             "usuario": username,
             "region": region,
@@ -152,9 +148,10 @@ def login_user(data: LoginData, http_client: HTTPClient) -> Dict[str, Any]:
 
     # multiple branches – store available options
     context["negocios"] = {b["name"]: b["id"] for b in branches if "name" in b and "id" in b}
+    context["negocios_idx"] = _index_negocios(context["negocios"])
     set_user_context(username, context)
     # Logging de selección necesaria
-    logger.info(json.dumps({
+    logger.info("%s", _LazyJSON({
         "event": "login_selection",
         "usuario": username,
         "region": region,
@@ -167,6 +164,11 @@ def login_user(data: LoginData, http_client: HTTPClient) -> Dict[str, Any]:
     }
 
 
+def _index_negocios(negocios: Dict[str, Any]) -> Dict[str, tuple]:
+    """Índice nombre normalizado -> (nombre original, id) para búsquedas O(1)."""
+    return {nombre.strip().lower(): (nombre, negocio_id) for nombre, negocio_id in negocios.items()}
+
+
 @log_call
 def seleccionar_negocio(data: SeleccionNegocio, http_client: HTTPClient) -> Dict[str, Any]:
     """Select a specific business for the authenticated user.
@@ -185,43 +187,41 @@ def seleccionar_negocio(data: SeleccionNegocio, http_client: HTTPClient) -> Dict
     negocio_nombre = data.nombre_negocio.strip().lower()
     ctx = get_user_context(username)
     if not ctx:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "seleccionar_negocio",
             "usuario": username,
             "detalle": "Sesión no iniciada o expirada",
         }))
         raise HTTPException(status_code=401, detail="Sesión no iniciada o expirada")
 
-    region = ctx["region"]
-    token = ctx["token"]
-    base_url = get_base_url(region)
-    origin = get_origin_url(region)
-
-    # refresh branches – although context may already have them
-    branches_url = f"{base_url}/api/v1/administration/my-branches"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "Accept": "*/*",
-        "Origin": origin,
-        "Referer": f"{origin}/",
-        "x-app-origin": "Tecopos-Admin",
-        "User-Agent": "Mozilla/5.0",
-    }
-    res = http_client.request("GET", branches_url, headers=headers)
-    if res.status_code != 200:
-        logger.error(json.dumps({
-            "event": "seleccionar_negocio_error",
-            "usuario": username,
-            "detalle": "No se pudieron obtener los negocios del usuario",
-        }))
-        raise HTTPException(status_code=500, detail="No se pudieron obtener los negocios del usuario")
-    negocios = res.json()
-
-    negocio = next((n for n in negocios if n["name"].strip().lower() == negocio_nombre), None)
+    # Las sucursales se guardaron al hacer login; solo se piden de nuevo
+    # si el contexto no las tiene.
+    negocios_idx = ctx.get("negocios_idx")
+    if negocios_idx is None and ctx.get("negocios"):
+        negocios_idx = ctx["negocios_idx"] = _index_negocios(ctx["negocios"])
+    if negocios_idx is None:
+        region = ctx["region"]
+        token = ctx["token"]
+        base_url = get_base_url(region)
+
+        branches_url = f"{base_url}/api/v1/administration/my-branches"
+        headers = {**build_base_headers(region), "Authorization": f"Bearer {token}"}
+        res = http_client.request("GET", branches_url, headers=headers)
+        if res.status_code != 200:
+            logger.error("%s", _LazyJSON({
+                "event": "seleccionar_negocio_error",
+                "usuario": username,
+                "detalle": "No se pudieron obtener los negocios del usuario",
+            }))
+            raise HTTPException(status_code=500, detail="No se pudieron obtener los negocios del usuario")
+        ctx["negocios"] = {n["name"]: n["id"] for n in res.json() if "name" in n and "id" in n}
+        negocios_idx = ctx["negocios_idx"] = _index_negocios(ctx["negocios"])
+
+    encontrado = negocios_idx.get(negocio_nombre)
+    negocio = {"name": encontrado[0], "id": encontrado[1]} if encontrado else None
     if not negocio:
-        nombres_disponibles = [n["name"] for n in negocios]
-        logger.warning(json.dumps({
+        nombres_disponibles = [nombre for nombre, _ in negocios_idx.values()]
+        logger.warning("%s", _LazyJSON({
             "event": "seleccionar_negocio_no_encontrado",
             "usuario": username,
             "solicitado": data.nombre_negocio,
@@ -233,7 +233,7 @@ def seleccionar_negocio(data: SeleccionNegocio, http_client: HTTPClient) -> Dict
     ctx["businessId"] = negocio["id"]
     set_user_context(username, ctx)
     # Logging de selección exitosa
-    logger.info(json.dumps({
+    logger.info("%s", _LazyJSON({
         "event": "seleccionar_negocio_exito",
         "usuario": username,
         "negocio": negocio.get("name"),
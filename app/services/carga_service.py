@@ -11,14 +11,16 @@ payloads into the expected formats.
 
 from __future__ import annotations
 
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List
 from datetime import datetime
 from fastapi import HTTPException
 
 from app.core.context import get_user_context
 from app.core.auth import get_base_url, build_auth_headers
-from app.clients.http_client import HTTPClient
+from app.clients.http_client import CATALOG_TTL, HTTPClient
+from app.core.http_sync import BATCH_CONCURRENCY, teco_batch, teco_json
 from app.logging_config import logger, log_call
+from app.utils.cache import cache
 import json
 from app.schemas.carga import (
     CrearCargaConProductosRequest,
@@ -30,13 +32,30 @@ from app.schemas.carga import (
 )
 
 
+def _producto_key(ctx: Dict[str, Any], campo: str, valor: str) -> tuple:
+    """Clave de caché de una búsqueda de producto, acotada al negocio.
+
+    Solo el nombre se normaliza (la búsqueda por nombre ya compara sin
+    mayúsculas ni espacios); el código se busca tal cual y se cachea tal cual.
+    """
+    if campo == "name":
+        valor = valor.strip().lower()
+    return ("product", ctx["region"], ctx["businessId"], campo, valor)
+
+
 def buscar_producto(ctx: Dict[str, Any], code: str, http_client: HTTPClient) -> Dict[str, Any] | None:
-    url = f"{get_base_url(ctx['region'])}/api/v1/administration/product/search?code={code}"
-    headers = build_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
-    r = http_client.request("GET", url, headers=headers)
-    if r.status_code == 200 and r.json():
-        return r.json()[0]
-    return None
+    def _buscar() -> Dict[str, Any] | None:
+        url = f"{get_base_url(ctx['region'])}/api/v1/administration/product/search?code={code}"
+        headers = build_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
+        r = http_client.request("GET", url, headers=headers)
+        if r.status_code == 200:
+            encontrados = r.json()
+            if encontrados:
+                return encontrados[0]
+        return None
+
+    # solo se cachean los aciertos: un producto nuevo se ve en cuanto existe
+    return cache.get_or_set(_producto_key(ctx, "code", code), _buscar, CATALOG_TTL)
 
 
 def crear_categoria_si_no_existe(ctx: Dict[str, Any], nombre_categoria: str, http_client: HTTPClient) -> int:
@@ -69,6 +88,8 @@ def crear_producto(ctx: Dict[str, Any], producto: ProductoCarga, categoria_id: i
     r = http_client.request("POST", url, json=payload, headers=headers)
     if r.status_code != 200:
         raise HTTPException(status_code=r.status_code, detail=r.text)
+    cache.delete(_producto_key(ctx, "code", producto.code))
+    cache.delete(_producto_key(ctx, "name", producto.name))
     return r.json()["id"]
 
 
@@ -79,16 +100,25 @@ def crear_carga_con_productos(data: CrearCargaConProductosRequest, http_client:
         raise HTTPException(status_code=403, detail="Usuario no autenticado")
     base_url = get_base_url(ctx["region"])
     headers = build_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
-    batches: List[Dict[str, Any]] = []
-    for prod in data.productos:
+
+    def resolver_producto(prod: ProductoCarga) -> int:
         encontrado = buscar_producto(ctx, prod.code, http_client)
         if encontrado:
-            product_id = encontrado["id"]
-        else:
-            categoria_id = crear_categoria_si_no_existe(ctx, prod.category or "Sin categoría", http_client)
-            product_id = crear_producto(ctx, prod, categoria_id, http_client)
+            return encontrado["id"]
+        categoria_id = crear_categoria_si_no_existe(ctx, prod.category or "Sin categoría", http_client)
+        return crear_producto(ctx, prod, categoria_id, http_client)
+
+    # Cada código se resuelve una sola vez (evita crear el mismo producto
+    # dos veces) y los códigos distintos se resuelven en paralelo.
+    por_codigo: Dict[str, ProductoCarga] = {}
+    for prod in data.productos:
+        por_codigo.setdefault(prod.code, prod)
+    ids = teco_batch([{"prod": prod} for prod in por_codigo.values()], send=resolver_producto)
+    id_por_codigo = dict(zip(por_codigo, ids))
+    batches: List[Dict[str, Any]] = []
+    for prod in data.productos:
         batches.append({
-            "productId": product_id,
+            "productId": id_por_codigo[prod.code],
             "quantity": prod.quantity,
             "cost": {"amount": prod.cost, "codeCurrency": prod.codeCurrency},
             "expirationAt": prod.expirationAt,
@@ -113,17 +143,21 @@ def crear_carga_con_productos(data: CrearCargaConProductosRequest, http_client:
 
 
 def buscar_producto_por_nombre(ctx: Dict[str, Any], nombre: str, http_client: HTTPClient) -> Dict[str, Any] | None:
-    base_url = get_base_url(ctx["region"])
-    headers = build_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
-    url = f"{base_url}/api/v1/administration/product?search={nombre}"
-    r = http_client.request("GET", url, headers=headers)
-    if r.status_code == 200:
-        data = r.json()
-        productos = data.get("items", []) if isinstance(data, dict) else []
-        for p in productos:
-            if isinstance(p, dict) and p.get("name", "").strip().lower() == nombre.strip().lower():
-                return p
-    return None
+    def _buscar() -> Dict[str, Any] | None:
+        base_url = get_base_url(ctx["region"])
+        headers = build_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
+        url = f"{base_url}/api/v1/administration/product?search={nombre}"
+        r = http_client.request("GET", url, headers=headers)
+        if r.status_code == 200:
+            data = r.json()
+            productos = data.get("items", []) if isinstance(data, dict) else []
+            objetivo = nombre.strip().lower()
+            for p in productos:
+                if isinstance(p, dict) and p.get("name", "").strip().lower() == objetivo:
+                    return p
+        return None
+
+    return cache.get_or_set(_producto_key(ctx, "name", nombre), _buscar, CATALOG_TTL)
 
 
 def registrar_producto_en_carga(ctx: Dict[str, Any], carga_id: int, product_id: int, prod: ProductoEntradaCarga, http_client: HTTPClient) -> None:
@@ -153,8 +187,15 @@ def entrada_productos_en_carga(data: EntradaProductosEnCargaRequest, http_client
         raise HTTPException(status_code=403, detail="Usuario no autenticado")
     productos_faltantes: List[str] = []
     productos_validos: List[tuple] = []
+    # búsquedas por nombre en paralelo, una por nombre distinto
+    nombres = list(dict.fromkeys(prod.name for prod in data.productos))
+    encontrados = teco_batch(
+        [{"ctx": ctx, "nombre": nombre, "http_client": http_client} for nombre in nombres],
+        send=buscar_producto_por_nombre,
+    )
+    existentes = dict(zip(nombres, encontrados))
     for prod in data.productos:
-        existente = buscar_producto_por_nombre(ctx, prod.name, http_client)
+        existente = existentes[prod.name]
         if not existente:
             productos_faltantes.append(prod.name)
         else:
@@ -166,12 +207,20 @@ def entrada_productos_en_carga(data: EntradaProductosEnCargaRequest, http_client
         })
     errores: List[str] = []
     exitosos: List[str] = []
-    for product_id, prod in productos_validos:
-        try:
-            registrar_producto_en_carga(ctx, data.carga_id, product_id, prod, http_client)
+    # registros independientes en paralelo; los fallos se recogen en orden
+    resultados = teco_batch(
+        [
+            {"ctx": ctx, "carga_id": data.carga_id, "product_id": product_id, "prod": prod, "http_client": http_client}
+            for product_id, prod in productos_validos
+        ],
+        send=registrar_producto_en_carga,
+        return_exceptions=True,
+    )
+    for (_, prod), resultado in zip(productos_validos, resultados):
+        if isinstance(resultado, Exception):
+            errores.append(str(resultado))
+        else:
             exitosos.append(prod.name)
-        except Exception as e:
-            errores.append(str(e))
     return {
         "mensaje": "Proceso completado",
         "registrados": exitosos,
@@ -179,42 +228,70 @@ def entrada_productos_en_carga(data: EntradaProductosEnCargaRequest, http_client
     }
 
 
-@log_call
-def listar_cargas_disponibles(usuario: str, http_client: HTTPClient) -> Dict[str, Any]:
+# Campos de una carga que expone /listar-cargas-disponibles
+CARGA_FIELDS = ("id", "name", "status", "createdAt")
+
+
+def iter_cargas_disponibles(usuario: str, http_client: HTTPClient) -> Iterator[List[Dict[str, Any]]]:
+    """Cargas disponibles, página a página.
+
+    La primera página se pide al llamar (los errores de sesión o del API
+    saltan aquí, antes de empezar a responder); el resto se pide en tandas
+    paralelas de ``BATCH_CONCURRENCY`` páginas a medida que se consume.
+    """
     ctx = get_user_context(usuario)
     if not ctx:
         raise HTTPException(status_code=403, detail="Usuario no autenticado")
     base_url = get_base_url(ctx["region"])
     headers = build_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
-    cargas: List[Dict[str, Any]] = []
-    pagina = 1
-    while True:
-        url = f"{base_url}/api/v1/administration/buyedreceipt?page={pagina}"
-        r = http_client.request("GET", url, headers=headers)
+    # solo los campos que se devuelven; si el API ignora ``fields`` la
+    # proyección de ``_cargas`` sigue recortando la respuesta
+    url = f"{base_url}/api/v1/administration/buyedreceipt?fields={','.join(CARGA_FIELDS)}"
+
+    def _pagina(r: Any) -> Dict[str, Any]:
+        if isinstance(r, Exception):
+            raise r
         if r.status_code != 200:
             raise HTTPException(status_code=r.status_code, detail=r.text)
-        data = r.json()
-        items = data.get("items", [])
-        for carga in items:
-            cargas.append({
-                "id": carga["id"],
-                "name": carga["name"],
-                "status": carga["status"],
-                "createdAt": carga["createdAt"],
-            })
-        if pagina >= data.get("totalPages", 1):
-            break
-        pagina += 1
-    return {"cargas_disponibles": cargas}
+        return teco_json(r)
+
+    def _cargas(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [{campo: carga[campo] for campo in CARGA_FIELDS} for carga in data.get("items", [])]
+
+    # la primera página trae ``totalPages``; el resto se pide en paralelo
+    primera = _pagina(http_client.request("GET", f"{url}&page=1", headers=headers))
+    total_paginas = primera.get("totalPages", 1)
+
+    def _paginas() -> Iterator[List[Dict[str, Any]]]:
+        yield _cargas(primera)
+        if not isinstance(total_paginas, int):
+            return
+        for inicio in range(2, total_paginas + 1, BATCH_CONCURRENCY):
+            tanda = teco_batch(
+                [{"method": "GET", "url": f"{url}&page={n}", "headers": headers}
+                 for n in range(inicio, min(inicio + BATCH_CONCURRENCY, total_paginas + 1))],
+                send=http_client.request,
+                return_exceptions=True,
+            )
+            for r in tanda:
+                yield _cargas(_pagina(r))
+
+    return _paginas()
 
 
 def verificar_productos_existen(data: VerificarProductosRequest, http_client: HTTPClient) -> ProductosFaltantesResponse:
     ctx = get_user_context(data.usuario)
     if not ctx:
         raise HTTPException(status_code=403, detail="Usuario no autenticado")
-    nombres_faltantes: List[str] = []
-    for nombre in data.nombres_productos:
-        producto = buscar_producto_por_nombre(ctx, nombre, http_client)
-        if not producto:
-            nombres_faltantes.append(nombre)
-    return ProductosFaltantesResponse(productos_faltantes=nombres_faltantes)
\ No newline at end of file
+    # los nombres ya llegan sin duplicados (validador del esquema); las
+    # búsquedas son independientes y se lanzan en paralelo
+    encontrados = teco_batch(
+        [{"ctx": ctx, "nombre": nombre, "http_client": http_client} for nombre in data.nombres_productos],
+        send=buscar_producto_por_nombre,
+    )
+    nombres_faltantes: List[str] = [
+        nombre for nombre, producto in zip(data.nombres_productos, encontrados) if not producto
+    ]
+    # Frontera de confianza: la lista la construye este servicio a partir de
+    # nombres ya validados en la petición, así que se omite la revalidación.
+    return ProductosFaltantesResponse.model_construct(productos_faltantes=nombres_faltantes)
\ No newline at end of file
@@ -10,22 +10,52 @@ client and respects user context.
 
 from __future__ import annotations
 
+import math
 from typing import Dict, Any, List
 from fastapi import HTTPException
 
 from app.core.context import get_user_context
 from app.core.auth import get_base_url, build_auth_headers
 from app.clients.http_client import HTTPClient
-from app.logging_config import logger, log_call
-import json
+from app.core.http_sync import teco_batch, teco_json
+from app.logging_config import _LazyJSON, logger, log_call
+from app.utils.cache import cache
 from app.schemas.currency import CambioMonedaRequest
 
+# Los sistemas de precio de un negocio casi nunca cambian
+PRICE_SYSTEMS_TTL = 300
+
+
+def _price_systems_key(ctx: Dict[str, Any]) -> tuple:
+    return ("priceSystems", ctx["businessId"], ctx["region"])
+
+
+def _get_price_systems(ctx: Dict[str, Any], headers: Dict[str, str], http_client: HTTPClient, usuario: str) -> List[Dict[str, Any]]:
+    """Devuelve los ``priceSystems`` del negocio, cacheados por (businessId, región)."""
+    key = _price_systems_key(ctx)
+    price_systems = cache.get(key)
+    if price_systems is not None:
+        return price_systems
+    info_url = f"{get_base_url(ctx['region'])}/api/v1/administration/my-business"
+    info_res = http_client.request("GET", info_url, headers=headers)
+    if info_res.status_code != 200:
+        logger.error("%s", _LazyJSON({
+            "event": "actualizar_monedas_error",
+            "usuario": usuario,
+            "detalle": "No se pudo obtener información del negocio",
+            "status_code": info_res.status_code,
+        }))
+        raise HTTPException(status_code=500, detail="No se pudo obtener información del negocio")
+    price_systems = info_res.json().get("priceSystems", [])
+    cache.set(key, price_systems, PRICE_SYSTEMS_TTL)
+    return price_systems
+
 
 @log_call
 def actualizar_monedas(data: CambioMonedaRequest, http_client: HTTPClient) -> Dict[str, Any]:
     ctx = get_user_context(data.usuario)
     if not ctx:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "actualizar_monedas_sin_sesion",
             "usuario": data.usuario,
             "detalle": "Usuario no autenticado",
@@ -35,7 +65,7 @@ def actualizar_monedas(data: CambioMonedaRequest, http_client: HTTPClient) -> Di
     headers = build_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
     # Log inicio de actualización de monedas
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "actualizar_monedas_inicio",
             "usuario": data.usuario,
             "region": ctx.get("region"),
@@ -48,22 +78,12 @@ def actualizar_monedas(data: CambioMonedaRequest, http_client: HTTPClient) -> Di
     except Exception:
         pass
     # Obtener sistemas de precio
-    info_url = f"{base_url}/api/v1/administration/my-business"
-    info_res = http_client.request("GET", info_url, headers=headers)
-    if info_res.status_code != 200:
-        logger.error(json.dumps({
-            "event": "actualizar_monedas_error",
-            "usuario": data.usuario,
-            "detalle": "No se pudo obtener información del negocio",
-            "status_code": info_res.status_code,
-        }))
-        raise HTTPException(status_code=500, detail="No se pudo obtener información del negocio")
-    price_systems = info_res.json().get("priceSystems", [])
+    price_systems = _get_price_systems(ctx, headers, http_client, data.usuario)
     if data.system_price_id is not None:
         selected_system = next((s for s in price_systems if s["id"] == data.system_price_id), None)
     else:
         disponibles = [f"{s['name']} (ID: {s['id']})" for s in price_systems]
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "actualizar_monedas_seleccion_requerida",
             "usuario": data.usuario,
             "sistemas_disponibles": disponibles,
@@ -74,7 +94,7 @@ def actualizar_monedas(data: CambioMonedaRequest, http_client: HTTPClient) -> Di
             "sistemas_disponibles": disponibles,
         }
     if not selected_system:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "actualizar_monedas_system_not_found",
             "usuario": data.usuario,
             "system_price_id": data.system_price_id,
@@ -82,22 +102,63 @@ def actualizar_monedas(data: CambioMonedaRequest, http_client: HTTPClient) -> Di
         raise HTTPException(status_code=400, detail="Sistema de precio no encontrado")
     system_price_id = selected_system["id"]
     actualizados: List[Any] = []
-    page = 1
-    while True:
-        url = f"{base_url}/api/v1/administration/product?page={page}"
-        # Llamada GET para obtener productos paginados
-        res = http_client.request("GET", url, headers=headers)
+    product_url = f"{base_url}/api/v1/administration/product"
+
+    def _page(page: int, res: Any) -> tuple:
+        if isinstance(res, Exception):
+            raise res
         if res.status_code != 200:
-            logger.error(json.dumps({
+            logger.error("%s", _LazyJSON({
                 "event": "actualizar_monedas_error",
                 "usuario": data.usuario,
                 "detalle": f"Error al obtener productos (página {page})",
                 "status_code": res.status_code,
             }))
             raise HTTPException(status_code=500, detail=f"Error al obtener productos (página {page})")
-        items = res.json().get("items", [])
-        if not items:
-            break
+        body = teco_json(res)
+        # solo se usan id, nombre y precios: el resto del producto (imágenes,
+        # stock, metadatos...) no se retiene más allá de esta página
+        items = [
+            {"id": p["id"], "name": p["name"], "prices": p.get("prices", [])}
+            for p in body.get("items", [])
+        ]
+        return items, body.get("totalPages"), body.get("totalItems")
+
+    def _page_items(page: int, res: Any) -> List[Dict[str, Any]]:
+        return _page(page, res)[0]
+
+    # Llamada GET para obtener productos paginados. La primera página indica
+    # ``totalPages``; el resto se pide en paralelo y se procesa en orden.
+    first = http_client.request("GET", f"{product_url}?page=1", headers=headers)
+    first_items, total_pages, total_items = _page(1, first)
+    pages: List[List[Dict[str, Any]]] = [first_items]
+    if not first_items:
+        total_pages = None
+    elif not isinstance(total_pages, int) and isinstance(total_items, int):
+        # sin totalPages pero con totalItems: deducirlo del tamaño de página
+        total_pages = math.ceil(total_items / len(first_items))
+    if isinstance(total_pages, int) and total_pages > 1:
+        rest = teco_batch(
+            [{"method": "GET", "url": f"{product_url}?page={n}", "headers": headers}
+             for n in range(2, total_pages + 1)],
+            send=http_client.request,
+            return_exceptions=True,
+        )
+        pages.extend(_page_items(n, res) for n, res in enumerate(rest, start=2))
+    elif pages[0] and not isinstance(total_pages, int):
+        # sin totales: seguir página a página hasta una vacía
+        page = 2
+        while True:
+            res = http_client.request("GET", f"{product_url}?page={page}", headers=headers)
+            items = _page_items(page, res)
+            if not items:
+                break
+            pages.append(items)
+            page += 1
+
+    # productos a actualizar: (producto, payload del PATCH)
+    cambios: List[Any] = []
+    for items in pages:
         for p in items:
             prices = p.get("prices", [])
             # localizar precio objetivo dentro de la lista de precios
@@ -121,9 +182,7 @@ def actualizar_monedas(data: CambioMonedaRequest, http_client: HTTPClient) -> Di
                     "codeCurrency": data.moneda_deseada,
                 })
                 continue
-            # aplicar el cambio de moneda a través de PATCH
-            patch_url = f"{base_url}/api/v1/administration/product/{p['id']}"
-            patch_payload = {
+            cambios.append((p, {
                 "prices": [
                     {
                         "systemPriceId": system_price_id,
@@ -131,22 +190,41 @@ def actualizar_monedas(data: CambioMonedaRequest, http_client: HTTPClient) -> Di
                         "codeCurrency": data.moneda_deseada,
                     }
                 ],
-            }
-            patch_res = http_client.request("PATCH", patch_url, headers=headers, json=patch_payload)
-            if patch_res.status_code in [200, 204]:
-                actualizados.append(p["name"])
-            else:
-                logger.error(json.dumps({
-                    "event": "actualizar_monedas_error",
-                    "usuario": data.usuario,
-                    "producto": p.get("name"),
-                    "status_code": patch_res.status_code,
-                    "detalle": patch_res.text,
-                }))
-                raise HTTPException(status_code=500, detail=f"Error al actualizar '{p['name']}'")
-        page += 1
+            }))
+
+    # aplicar el cambio de moneda a través de PATCH, en paralelo
+    patch_results = teco_batch(
+        [{"method": "PATCH", "url": f"{product_url}/{p['id']}", "headers": headers, "json": payload}
+         for p, payload in cambios],
+        send=http_client.request,
+        return_exceptions=True,
+    )
+    # los fallos se acumulan en lugar de abortar: los PATCH ya enviados se
+    # aplicaron igualmente y el cliente debe saber cuáles
+    fallidos: List[Dict[str, Any]] = []
+    for (p, _), patch_res in zip(cambios, patch_results):
+        if not isinstance(patch_res, Exception) and patch_res.status_code in [200, 204]:
+            actualizados.append(p["name"])
+            continue
+        if isinstance(patch_res, Exception):
+            status_code, detalle = None, str(patch_res)
+        else:
+            status_code, detalle = patch_res.status_code, patch_res.text
+            if status_code == 401:
+                # sesión o negocio ya no válidos: no reutilizar la configuración
+                cache.delete(_price_systems_key(ctx))
+        logger.error("%s", _LazyJSON({
+            "event": "actualizar_monedas_error",
+            "usuario": data.usuario,
+            "producto": p.get("name"),
+            "status_code": status_code,
+            "detalle": detalle,
+        }))
+        fallidos.append({"producto": p["name"], "status_code": status_code, "detalle": detalle})
+    if fallidos and not actualizados:
+        raise HTTPException(status_code=500, detail=f"Error al actualizar '{fallidos[0]['producto']}'")
     if not data.confirmar:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "actualizar_monedas_simulacion",
             "usuario": data.usuario,
             "productos_para_cambiar": len(actualizados),
@@ -156,7 +234,20 @@ def actualizar_monedas(data: CambioMonedaRequest, http_client: HTTPClient) -> Di
             "mensaje": "Simulación de cambio de moneda",
             "productos_para_cambiar": actualizados,
         }
-    logger.info(json.dumps({
+    if fallidos:
+        logger.warning("%s", _LazyJSON({
+            "event": "actualizar_monedas_parcial",
+            "usuario": data.usuario,
+            "productos_actualizados": len(actualizados),
+            "productos_fallidos": len(fallidos),
+        }))
+        return {
+            "status": "parcial",
+            "mensaje": f"Se actualizaron {len(actualizados)} productos; {len(fallidos)} fallaron",
+            "productos_actualizados": actualizados,
+            "productos_fallidos": fallidos,
+        }
+    logger.info("%s", _LazyJSON({
         "event": "actualizar_monedas_exito",
         "usuario": data.usuario,
         "productos_actualizados": len(actualizados),
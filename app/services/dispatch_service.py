@@ -11,22 +11,37 @@ creating a movement dispatch. Filtering by category is optional.
 
 from __future__ import annotations
 
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from fastapi import HTTPException
 
 from app.core.context import get_user_context
 from app.core.auth import get_base_url, build_auth_headers
-from app.clients.http_client import HTTPClient
-from app.logging_config import logger, log_call
-import json
+from app.clients.http_client import CATALOG_TTL, HTTPClient
+from app.core.http_sync import teco_batch, teco_json
+from app.logging_config import _LazyJSON, logger, log_call
 from app.schemas.dispatch import ReplicarProductosRequest
+from app.utils.cache import cache
+
+
+def _categoria_id(base_url: str, headers: Dict[str, str], region: str, negocio_id: int,
+                  nombre: str, http_client: HTTPClient) -> Optional[int]:
+    """Id de la categoría de venta ``nombre`` en el negocio, o None si no se resuelve."""
+    res = http_client.get_cached(
+        f"{base_url}/api/v1/administration/salescategory",
+        headers=headers,
+        cache_key=("sales_categories", region, negocio_id),
+    )
+    if res.status_code != 200:
+        return None
+    categoria = next((c for c in res.json().get("items", []) if c.get("name") == nombre), None)
+    return categoria.get("id") if categoria else None
 
 
 @log_call
 def replicar_productos(data: ReplicarProductosRequest, http_client: HTTPClient) -> Dict[str, Any]:
     ctx = get_user_context(data.usuario)
     if not ctx:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "replicar_productos_sin_sesion",
             "usuario": data.usuario,
             "detalle": "Usuario no autenticado",
@@ -36,7 +51,7 @@ def replicar_productos(data: ReplicarProductosRequest, http_client: HTTPClient)
     token = ctx["token"]
     # Log inicio de replicación
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "replicar_productos_inicio",
             "usuario": data.usuario,
             "region": ctx.get("region"),
@@ -54,7 +69,7 @@ def replicar_productos(data: ReplicarProductosRequest, http_client: HTTPClient)
         headers = build_auth_headers(token, ctx["businessId"], ctx["region"])
         resp = http_client.request("GET", f"{base_url}/api/v1/administration/my-branches", headers=headers)
         if resp.status_code != 200:
-            logger.error(json.dumps({
+            logger.error("%s", _LazyJSON({
                 "event": "replicar_productos_error_negocios",
                 "usuario": data.usuario,
                 "detalle": "No se pudieron obtener los negocios disponibles",
@@ -62,7 +77,7 @@ def replicar_productos(data: ReplicarProductosRequest, http_client: HTTPClient)
             }))
             raise HTTPException(status_code=500, detail="No se pudieron obtener los negocios disponibles")
         negocios_disp = resp.json()
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "replicar_productos_negocios_listados",
             "usuario": data.usuario,
             "num_negocios": len(negocios_disp) if isinstance(negocios_disp, list) else None,
@@ -70,12 +85,20 @@ def replicar_productos(data: ReplicarProductosRequest, http_client: HTTPClient)
         return {"negocios_disponibles": negocios_disp}
     headers_origen = build_auth_headers(token, data.negocio_origen_id, ctx["region"])
     headers_destino = build_auth_headers(token, data.negocio_destino_id, ctx["region"])
+    # áreas de origen y destino: dos llamadas independientes, en paralelo
+    areas_url = f"{base_url}/api/v1/administration/area?page=1&type=STOCK"
+    # (cacheadas por negocio: cambian muy poco entre peticiones)
+    areas_calls = [
+        {"url": areas_url, "headers": headers_origen,
+         "cache_key": ("stock_areas", ctx["region"], data.negocio_origen_id)},
+        {"url": areas_url, "headers": headers_destino,
+         "cache_key": ("stock_areas", ctx["region"], data.negocio_destino_id)},
+    ]
     # Step 2: list areas if missing names
     if not data.area_origen_nombre or not data.area_destino_nombre:
-        resp_origen = http_client.request("GET", f"{base_url}/api/v1/administration/area?page=1&type=STOCK", headers=headers_origen)
-        resp_dest = http_client.request("GET", f"{base_url}/api/v1/administration/area?page=1&type=STOCK", headers=headers_destino)
+        resp_origen, resp_dest = teco_batch(areas_calls, send=http_client.get_cached)
         if resp_origen.status_code != 200 or resp_dest.status_code != 200:
-            logger.error(json.dumps({
+            logger.error("%s", _LazyJSON({
                 "event": "replicar_productos_error_areas",
                 "usuario": data.usuario,
                 "detalle": "No se pudieron obtener las áreas de stock",
@@ -93,7 +116,7 @@ def replicar_productos(data: ReplicarProductosRequest, http_client: HTTPClient)
             "areas_origen": [simplificar_area(a) for a in areas_origen if a["business"]["id"] == data.negocio_origen_id],
             "areas_destino": [simplificar_area(a) for a in areas_destino if a["business"]["id"] == data.negocio_destino_id],
         }
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "replicar_productos_areas_listadas",
             "usuario": data.usuario,
             "num_areas_origen": len(result["areas_origen"]),
@@ -101,14 +124,26 @@ def replicar_productos(data: ReplicarProductosRequest, http_client: HTTPClient)
         }))
         return result
     # Step 3: resolve area IDs
-    resp_origen = http_client.request("GET", f"{base_url}/api/v1/administration/area?page=1&type=STOCK", headers=headers_origen)
-    resp_dest = http_client.request("GET", f"{base_url}/api/v1/administration/area?page=1&type=STOCK", headers=headers_destino)
-    areas_origen = resp_origen.json().get("items", [])
-    areas_destino = resp_dest.json().get("items", [])
-    area_origen = next((a for a in areas_origen if a["name"] == data.area_origen_nombre and a["business"]["id"] == data.negocio_origen_id), None)
-    area_destino = next((a for a in areas_destino if a["name"] == data.area_destino_nombre and a["business"]["id"] == data.negocio_destino_id), None)
+    resp_origen, resp_dest = teco_batch(areas_calls, send=http_client.get_cached)
+
+    def _areas_por_nombre(resp: Any, negocio_id: int) -> Dict[str, Dict[str, Any]]:
+        # índice nombre -> área del negocio, cacheado junto a la lista
+        if resp.status_code != 200:
+            return {}
+        return cache.get_or_set(
+            # clave propia: este índice solo guarda áreas del negocio pedido,
+            # a diferencia del índice sin filtrar de rendimiento_service
+            ("stock_areas_by_name", ctx["region"], negocio_id, "own_business"),
+            # en orden inverso: con nombres repetidos gana el primero, como next()
+            lambda: {a["name"]: a for a in reversed(teco_json(resp).get("items", []))
+                     if a["business"]["id"] == negocio_id},
+            CATALOG_TTL,
+        )
+
+    area_origen = _areas_por_nombre(resp_origen, data.negocio_origen_id).get(data.area_origen_nombre)
+    area_destino = _areas_por_nombre(resp_dest, data.negocio_destino_id).get(data.area_destino_nombre)
     if not area_origen or not area_destino:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "replicar_productos_area_no_encontrada",
             "usuario": data.usuario,
             "area_origen_nombre": data.area_origen_nombre,
@@ -116,22 +151,70 @@ def replicar_productos(data: ReplicarProductosRequest, http_client: HTTPClient)
         }))
         raise HTTPException(status_code=404, detail="No se encontraron las áreas indicadas o no pertenecen al negocio correcto")
     # Step 4: gather product IDs from origin area (pagination)
-    productos_ids: List[int] = []
-    pagina = 1
-    while True:
-        resp = http_client.request("GET", f"{base_url}/api/v1/administration/product/area/{area_origen['id']}?page={pagina}", headers=headers_origen)
+    # Con filtro de categoría se pide al servidor que filtre (menos páginas
+    # y menos JSON); el filtro local de abajo se mantiene como garantía.
+    filtro_qs = ""
+    if data.filtro_categoria:
+        categoria_id = _categoria_id(base_url, headers_origen, ctx["region"], data.negocio_origen_id,
+                                     data.filtro_categoria, http_client)
+        if categoria_id is not None:
+            filtro_qs = f"salesCategoryId={categoria_id}&"
+    # URL de página: se completa con el número de página
+    productos_url = f"{base_url}/api/v1/administration/product/area/{area_origen['id']}?{filtro_qs}page="
+
+    def _pagina(pagina: int, resp: Any) -> Dict[str, Any]:
+        if isinstance(resp, Exception):
+            raise resp
         if resp.status_code != 200:
-            logger.error(json.dumps({
+            logger.error("%s", _LazyJSON({
                 "event": "replicar_productos_error_productos",
                 "usuario": data.usuario,
                 "detalle": f"Error al obtener productos del área de stock en la página {pagina}",
                 "status_code": resp.status_code,
             }))
             raise HTTPException(status_code=500, detail=f"Error al obtener productos del área de stock en la página {pagina}")
-        resultado = resp.json()
-        productos = resultado.get("items", [])
-        if not productos:
-            break
+        return teco_json(resp)
+
+    # La primera página indica ``totalPages``; el resto se pide en paralelo
+    # y se concatena en orden. Sin ese dato se sigue hasta una página vacía.
+    primera = _pagina(1, http_client.request("GET", f"{productos_url}1", headers=headers_origen))
+    paginas: List[List[Dict[str, Any]]] = [primera.get("items", [])]
+    total_paginas = primera.get("totalPages")
+    if paginas[0] and isinstance(total_paginas, int):
+        if total_paginas > 1:
+            resto = teco_batch(
+                [{"method": "GET", "url": f"{productos_url}{n}", "headers": headers_origen}
+                 for n in range(2, total_paginas + 1)],
+                send=http_client.request,
+                return_exceptions=True,
+            )
+            paginas.extend(_pagina(n, r).get("items", []) for n, r in enumerate(resto, start=2))
+    elif paginas[0]:
+        # sin totales: se piden dos páginas por vuelta (la siguiente va en
+        # vuelo mientras se procesa la actual); a lo sumo sobra una petición
+        pagina = 2
+        while True:
+            par = teco_batch(
+                [{"method": "GET", "url": f"{productos_url}{n}", "headers": headers_origen}
+                 for n in (pagina, pagina + 1)],
+                send=http_client.request,
+                return_exceptions=True,
+            )
+            actual = _pagina(pagina, par[0]).get("items", [])
+            if not actual:
+                break
+            paginas.append(actual)
+            siguiente = _pagina(pagina + 1, par[1]).get("items", [])
+            if not siguiente:
+                break
+            paginas.append(siguiente)
+            pagina += 2
+
+    # las líneas del despacho se construyen directamente; un producto
+    # repetido entre páginas se envía una sola vez
+    vistos: set[int] = set()
+    productos_despacho: List[Dict[str, Any]] = []
+    for productos in paginas:
         for p in productos:
             producto = p.get("product")
             if not producto or "id" not in producto:
@@ -140,10 +223,13 @@ def replicar_productos(data: ReplicarProductosRequest, http_client: HTTPClient)
             if data.filtro_categoria:
                 if categoria != data.filtro_categoria:
                     continue
-            productos_ids.append(producto["id"])
-        pagina += 1
-    if not productos_ids:
-        logger.warning(json.dumps({
+            pid = producto["id"]
+            if pid in vistos:
+                continue
+            vistos.add(pid)
+            productos_despacho.append({"productId": pid, "quantity": 0})
+    if not productos_despacho:
+        logger.warning("%s", _LazyJSON({
             "event": "replicar_productos_sin_productos",
             "usuario": data.usuario,
             "detalle": "No se encontraron productos para replicar en el área origen",
@@ -154,22 +240,22 @@ def replicar_productos(data: ReplicarProductosRequest, http_client: HTTPClient)
         "stockAreaFromId": area_origen["id"],
         "stockAreaToId": area_destino["id"],
         "mode": "MOVEMENT",
-        "products": [{"productId": pid, "quantity": 0} for pid in productos_ids],
+        "products": productos_despacho,
     }
     resp_despacho = http_client.request("POST", f"{base_url}/api/v1/administration/dispatch/v3", json=despacho_payload, headers=headers_origen)
     if resp_despacho.status_code != 201:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "replicar_productos_error_despacho",
             "usuario": data.usuario,
             "status_code": resp_despacho.status_code,
             "detalle": resp_despacho.text,
         }))
         raise HTTPException(status_code=500, detail=f"Error al crear el despacho: {resp_despacho.text}")
-    logger.info(json.dumps({
+    logger.info("%s", _LazyJSON({
         "event": "replicar_productos_exito",
         "usuario": data.usuario,
         "despacho_id": resp_despacho.json().get("id"),
-        "num_productos": len(productos_ids),
+        "num_productos": len(productos_despacho),
     }))
     return {
         "mensaje": "Despacho creado exitosamente para replicación",
@@ -12,21 +12,27 @@ Notas:
 - Envía los adjuntos como bytes y valida tamaño > 0 antes de enviar.
 - Separa los imports de reportlab y email_utils para que Excel pueda
   enviarse aunque falte reportlab en el entorno.
+- Cachea los adjuntos generados por hash del contenido: si el inventario
+  no cambió no se vuelve a renderizar el Excel/PDF.
+- Con ``background_tasks`` el adjunto se genera y envía después de
+  responder; la respuesta no espera al render ni al SMTP.
 """
 
 from __future__ import annotations
 
-from typing import Dict, Any, List, Optional
+from hashlib import sha1
+from typing import Dict, Any, List, Optional, Tuple
 from io import BytesIO
+import orjson
 import pandas as pd
-from fastapi import HTTPException
+from fastapi import BackgroundTasks, HTTPException
 
 from app.core.context import get_user_context
 from app.core.auth import get_base_url, build_auth_headers
 from app.clients.http_client import HTTPClient
-from app.logging_config import logger, log_call
-import json
-from app.utils.cache import cache
+from app.core.http_sync import teco_json, teco_pages
+from app.logging_config import _LazyJSON, logger, log_call
+from app.utils.cache import TTLCache, cache
 
 # -------------------------------
 # Imports opcionales (separados)
@@ -55,14 +61,19 @@ def _teco_get_all_stock(http_client: HTTPClient, base_url: str, headers: dict) -
     Admite respuesta como lista directa o como objeto con claves comunes.
     """
     items: List[Dict[str, Any]] = []
-    page = 1
-    while True:
-        url = f"{base_url}/api/v1/report/stock/disponibility"
-        resp = http_client.request("GET", url, headers=headers, params={"page": page})
+    url = f"{base_url}/api/v1/report/stock/disponibility"
+    # varias páginas en vuelo a la vez; se procesan en orden hasta la última
+    # (según totalPages) o hasta la vacía
+    for page, resp in teco_pages(
+        lambda n: {"method": "GET", "url": url, "headers": headers, "params": {"page": n}},
+        send=http_client.request,
+    ):
+        if isinstance(resp, Exception):
+            raise resp
         if resp.status_code < 200 or resp.status_code >= 300:
             raise HTTPException(status_code=resp.status_code, detail=f"Error al consultar inventario (page={page})")
 
-        data = resp.json()
+        data = teco_json(resp)
         # Adapta según formato real: lista directa o envuelta en "items"/"content"/"result"
         if isinstance(data, list):
             chunk = data
@@ -78,11 +89,18 @@ def _teco_get_all_stock(http_client: HTTPClient, base_url: str, headers: dict) -
             break
 
         items.extend(chunk)
-        page += 1
+        # con totalPages no hace falta pedir otra tanda para ver la página vacía
+        total_paginas = data.get("totalPages") if isinstance(data, dict) else None
+        if isinstance(total_paginas, int) and page >= total_paginas:
+            break
 
     return items
 
 
+# Distingue "clave ausente" de un valor None en los .get del mapeo
+_FALTA = object()
+
+
 def _filtrar_mapeo_productos(raw: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Mapea las posibles claves devueltas por Tecopos a la salida estándar:
@@ -91,22 +109,26 @@ def _filtrar_mapeo_productos(raw: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     out: List[Dict[str, Any]] = []
     for p in raw:
-        nombre = p.get("productName") or p.get("name") or ""
-        disp = p.get("disponibility", p.get("quantity", 0)) or 0
-        medida = p.get("measure", "") or p.get("unit", "")
+        # El default de .get se evalúa siempre: "quantity" solo se busca si falta
+        disp = p.get("disponibility", _FALTA)
+        if disp is _FALTA:
+            disp = p.get("quantity", 0)
+        disp = disp or 0
         try:
             disp_num = float(disp)
         except Exception:
             disp_num = 0.0
-
-        if disp_num > 0:
-            out.append(
-                {
-                    "Producto": nombre,
-                    "Disponibilidad": round(disp_num, 2),
-                    "Medida": medida,
-                }
-            )
+        # Sin stock (la mayoría de los SKU): descartar antes de leer nombre y medida
+        if disp_num <= 0:
+            continue
+
+        out.append(
+            {
+                "Producto": p.get("productName") or p.get("name") or "",
+                "Disponibilidad": round(disp_num, 2),
+                "Medida": p.get("measure", "") or p.get("unit", ""),
+            }
+        )
     return out
 
 
@@ -149,6 +171,102 @@ def generar_pdf_inventario(productos: List[Dict[str, Any]]) -> BytesIO:
     return buffer
 
 
+# Vida de un adjunto renderizado (segundos)
+REPORT_TTL = 600
+
+# Caché propia y pequeña para los adjuntos: cada uno pesa varios MB, así
+# que no van a la caché global (acotada en entradas, no en bytes)
+_REPORT_CACHE = TTLCache(maxsize=8)
+
+
+def _render_reporte(productos: List[Dict[str, Any]], formato: str) -> Tuple[bytes, str, str]:
+    """Devuelve (bytes, nombre_archivo, tipo_mime) del reporte en ``formato``."""
+    if formato.lower() == "excel":
+        # Construir Excel en memoria
+        df = pd.DataFrame(productos)
+        output = BytesIO()
+        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+            df.to_excel(writer, index=False, sheet_name="Inventario")
+        return (
+            output.getvalue(),
+            "inventario.xlsx",
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+    # Construir PDF en memoria (requiere reportlab)
+    return generar_pdf_inventario(productos).getvalue(), "inventario.pdf", "application/pdf"
+
+
+def _reporte_cacheado(business_id: Any, productos: List[Dict[str, Any]], formato: str) -> Tuple[bytes, str, str]:
+    """Reporte renderizado, cacheado por negocio, formato y hash de las filas.
+
+    Un cambio en el inventario cambia el hash, así que nunca se sirve un
+    adjunto desactualizado.
+    """
+    digest = sha1(orjson.dumps(productos)).hexdigest()
+    formato = formato.lower()
+    return _REPORT_CACHE.get_or_set(
+        ("inventory_report", business_id, formato, digest),
+        lambda: _render_reporte(productos, formato),
+        REPORT_TTL,
+        cache_if=lambda reporte: bool(reporte[0]),
+    )
+
+
+def _enviar_reporte(
+    usuario: str,
+    destinatario: str,
+    formato: str,
+    business_id: Any,
+    productos: List[Dict[str, Any]],
+) -> None:
+    """Genera (o reutiliza) el adjunto y lo envía por correo."""
+    archivo_bytes, nombre_archivo, tipo_mime = _reporte_cacheado(business_id, productos, formato)
+
+    # Verificación defensiva: tamaño > 0
+    if not archivo_bytes or len(archivo_bytes) == 0:
+        logger.error("%s", _LazyJSON({
+            "event": "totalizar_inventario_error_adjunto",
+            "usuario": usuario,
+            "detalle": "Adjunto vacío; verificar generación del archivo",
+        }))
+        raise HTTPException(status_code=500, detail="Adjunto vacío; verificar generación del archivo")
+
+    # Enviar correo (adjunto como bytes)
+    enviar_correo(
+        destinatario=destinatario,
+        asunto="Reporte de Inventario",
+        cuerpo="Adjunto el inventario solicitado.",
+        archivo_adjunto=archivo_bytes,
+        nombre_archivo=nombre_archivo,
+        tipo_mime=tipo_mime,
+    )
+    # Log envío de correo exitoso
+    logger.info("%s", _LazyJSON({
+        "event": "totalizar_inventario_correo_enviado",
+        "usuario": usuario,
+        "destinatario": destinatario,
+        "formato": formato,
+    }))
+
+
+def _enviar_reporte_en_segundo_plano(
+    usuario: str,
+    destinatario: str,
+    formato: str,
+    business_id: Any,
+    productos: List[Dict[str, Any]],
+) -> None:
+    """``_enviar_reporte`` como tarea de fondo: la respuesta ya salió, los fallos solo se registran."""
+    try:
+        _enviar_reporte(usuario, destinatario, formato, business_id, productos)
+    except Exception as e:
+        logger.error("%s", _LazyJSON({
+            "event": "totalizar_inventario_error_correo",
+            "usuario": usuario,
+            "detalle": getattr(e, "detail", None) or str(e),
+        }), exc_info=True)
+
+
 # -------------------------------
 # Servicio principal
 # -------------------------------
@@ -159,6 +277,8 @@ def totalizar_inventario(
     destinatario: Optional[str],
     formato: str,  # "excel" o "pdf"
     http_client: HTTPClient,
+    fresh: bool = False,
+    background_tasks: Optional[BackgroundTasks] = None,
 ) -> Dict[str, Any]:
     """
     Retorna:
@@ -168,11 +288,14 @@ def totalizar_inventario(
     }
 
     Si enviar_por_correo=True y se provee destinatario, adjunta el reporte (excel/pdf) al correo.
+    Con fresh=True se ignora el inventario cacheado y se vuelve a consultar.
+    Con background_tasks el correo se envía después de responder y la
+    respuesta incluye "correo": {"estado": "en_cola", ...}.
     """
     # 1) Contexto Tecopos
     ctx = get_user_context(usuario)
     if not ctx:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "totalizar_inventario_sin_sesion",
             "usuario": usuario,
             "detalle": "Usuario no autenticado",
@@ -180,7 +303,7 @@ def totalizar_inventario(
         raise HTTPException(status_code=403, detail="Usuario no autenticado")
     # Log inicio del proceso
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "totalizar_inventario_inicio",
             "usuario": usuario,
             "region": ctx.get("region"),
@@ -196,7 +319,7 @@ def totalizar_inventario(
 
     # 2) Cache (por businessId)
     cache_key = f"inventory_{ctx['businessId']}"
-    productos_filtrados: Optional[List[Dict[str, Any]]] = cache.get(cache_key)
+    productos_filtrados: Optional[List[Dict[str, Any]]] = None if fresh else cache.get(cache_key)
 
     # 3) Fetch + paginación cuando no hay cache
     if productos_filtrados is None:
@@ -206,7 +329,7 @@ def totalizar_inventario(
 
     # 4) Validaciones
     if not productos_filtrados:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "totalizar_inventario_sin_productos",
             "usuario": usuario,
             "detalle": "No hay productos con disponibilidad",
@@ -214,66 +337,37 @@ def totalizar_inventario(
         raise HTTPException(status_code=404, detail="No hay productos con disponibilidad")
 
     # 5) Envío de correo (opcional)
+    correo: Optional[Dict[str, Any]] = None
     if enviar_por_correo and destinatario:
         if not enviar_correo:
-            logger.error(json.dumps({
+            logger.error("%s", _LazyJSON({
                 "event": "totalizar_inventario_error_correo",
                 "usuario": usuario,
                 "detalle": "Módulo de correo no disponible (email_utils)",
             }))
             raise HTTPException(status_code=500, detail="Módulo de correo no disponible (email_utils)")
 
-        if formato.lower() == "excel":
-            # Construir Excel en memoria
-            df = pd.DataFrame(productos_filtrados)
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-                df.to_excel(writer, index=False, sheet_name="Inventario")
-            output.seek(0)  # rebobinar antes de leer
-            archivo_bytes = output.getvalue()
-            nombre_archivo = "inventario.xlsx"
-            tipo_mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        if background_tasks is not None:
+            # El render y el envío corren después de responder
+            background_tasks.add_task(
+                _enviar_reporte_en_segundo_plano,
+                usuario, destinatario, formato, ctx["businessId"], productos_filtrados,
+            )
+            correo = {"estado": "en_cola", "formato": formato, "destinatario": destinatario}
         else:
-            # Construir PDF en memoria (requiere reportlab)
-            pdf_buffer = generar_pdf_inventario(productos_filtrados)
-            archivo_bytes = pdf_buffer.getvalue()
-            nombre_archivo = "inventario.pdf"
-            tipo_mime = "application/pdf"
-
-        # Verificación defensiva: tamaño > 0
-        if not archivo_bytes or len(archivo_bytes) == 0:
-            logger.error(json.dumps({
-                "event": "totalizar_inventario_error_adjunto",
-                "usuario": usuario,
-                "detalle": "Adjunto vacío; verificar generación del archivo",
-            }))
-            raise HTTPException(status_code=500, detail="Adjunto vacío; verificar generación del archivo")
-
-        # Enviar correo (adjunto como bytes)
-        enviar_correo(
-            destinatario=destinatario,
-            asunto="Reporte de Inventario",
-            cuerpo="Adjunto el inventario solicitado.",
-            archivo_adjunto=archivo_bytes,
-            nombre_archivo=nombre_archivo,
-            tipo_mime=tipo_mime,
-        )
-        # Log envío de correo exitoso
-        logger.info(json.dumps({
-            "event": "totalizar_inventario_correo_enviado",
-            "usuario": usuario,
-            "destinatario": destinatario,
-            "formato": formato,
-        }))
+            _enviar_reporte(usuario, destinatario, formato, ctx["businessId"], productos_filtrados)
 
     # 6) Respuesta
     # Log finalización del totalizado
-    logger.info(json.dumps({
+    logger.info("%s", _LazyJSON({
         "event": "totalizar_inventario_fin",
         "usuario": usuario,
         "total_productos": len(productos_filtrados),
     }))
-    return {
+    resultado: Dict[str, Any] = {
         "total": len(productos_filtrados),
         "productos": productos_filtrados,
     }
+    if correo is not None:
+        resultado["correo"] = correo
+    return resultado
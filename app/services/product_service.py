@@ -15,10 +15,10 @@ from typing import Dict, Any, List, Optional, Tuple, Literal
 from fastapi import HTTPException
 
 from app.core.auth import get_base_url, build_auth_headers
-from app.logging_config import logger, log_call
-import json
+from app.logging_config import _LazyJSON, logger, log_call
 from app.core.context import get_user_context
 from app.clients.http_client import HTTPClient
+from app.core.http_sync import teco_json
 from app.schemas.products import Producto, ProductoEntradaInteligente, EntradaInteligenteRequest
 
 from collections import defaultdict
@@ -160,7 +160,7 @@ def crear_o_buscar_producto(producto: ProductoEntradaInteligente, base_url: str,
     res = http_client.request("GET", search_url, headers=headers)
     if res.status_code != 200:
         raise HTTPException(status_code=500, detail=f"No se pudo buscar '{producto.nombre}'")
-    items = res.json().get("items", [])
+    items = teco_json(res).get("items", [])
     existente = next((p for p in items if normalizar(p.get("name", "")) == nombre_norm), None)
     if existente:
         return existente["id"]
@@ -184,7 +184,7 @@ def crear_producto_con_categoria(data: Producto, http_client: HTTPClient) -> Dic
     """Create a new product under a specific or inferred category."""
     ctx = get_user_context(data.usuario)
     if not ctx:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "crear_producto_sin_sesion",
             "usuario": data.usuario,
             "detalle": "Usuario no autenticado",
@@ -194,7 +194,7 @@ def crear_producto_con_categoria(data: Producto, http_client: HTTPClient) -> Dic
     headers = build_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
     # Log entrada de creación de producto
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "crear_producto_inicio",
             "usuario": data.usuario,
             "region": ctx.get("region"),
@@ -226,14 +226,14 @@ def crear_producto_con_categoria(data: Producto, http_client: HTTPClient) -> Dic
     try:
         crear_res = http_client.request("POST", crear_url, headers=headers, json=crear_payload)
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "crear_producto_error",
             "usuario": data.usuario,
             "detalle": str(e),
         }), exc_info=True)
         raise
     if crear_res.status_code not in [200, 201]:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "crear_producto_error",
             "usuario": data.usuario,
             "status_code": crear_res.status_code,
@@ -241,7 +241,7 @@ def crear_producto_con_categoria(data: Producto, http_client: HTTPClient) -> Dic
         }))
         raise HTTPException(status_code=500, detail="No se pudo crear el producto")
     # Log éxito
-    logger.info(json.dumps({
+    logger.info("%s", _LazyJSON({
         "event": "crear_producto_exito",
         "usuario": data.usuario,
         "product_id": crear_res.json().get("id"),
@@ -262,7 +262,7 @@ def entrada_inteligente(data: EntradaInteligenteRequest, http_client: HTTPClient
     """Process an intelligent stock entry (bulk entry)."""
     ctx = get_user_context(data.usuario)
     if not ctx:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "entrada_inteligente_sin_sesion",
             "usuario": data.usuario,
             "detalle": "Usuario no autenticado",
@@ -272,7 +272,7 @@ def entrada_inteligente(data: EntradaInteligenteRequest, http_client: HTTPClient
     headers = build_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
     # Log inicio de entrada inteligente
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "entrada_inteligente_inicio",
             "usuario": data.usuario,
             "region": ctx.get("region"),
@@ -285,16 +285,18 @@ def entrada_inteligente(data: EntradaInteligenteRequest, http_client: HTTPClient
     # If no stockAreaId provided, list available warehouses
     if not data.stockAreaId:
         almacenes_url = f"{base_url}/api/v1/administration/area?type=STOCK"
-        res = http_client.request("GET", almacenes_url, headers=headers)
+        res = http_client.get_cached(
+            almacenes_url, headers=headers, cache_key=("stock_areas_all", ctx["region"], ctx["businessId"]),
+        )
         if res.status_code != 200:
-            logger.error(json.dumps({
+            logger.error("%s", _LazyJSON({
                 "event": "entrada_inteligente_error",
                 "usuario": data.usuario,
                 "detalle": "No se pudieron obtener los almacenes",
             }))
             raise HTTPException(status_code=500, detail="No se pudieron obtener los almacenes")
-        almacenes = res.json().get("items", [])
-        logger.info(json.dumps({
+        almacenes = teco_json(res).get("items", [])
+        logger.info("%s", _LazyJSON({
             "event": "entrada_inteligente_seleccion_area",
             "usuario": data.usuario,
             "mensaje": "Seleccione un área de stock",
@@ -310,7 +312,7 @@ def entrada_inteligente(data: EntradaInteligenteRequest, http_client: HTTPClient
         try:
             producto_id = crear_o_buscar_producto(prod, base_url, headers, http_client)
         except Exception as e:
-            logger.error(json.dumps({
+            logger.error("%s", _LazyJSON({
                 "event": "entrada_inteligente_error_crear_buscar",
                 "usuario": data.usuario,
                 "producto": prod.nombre,
@@ -328,7 +330,7 @@ def entrada_inteligente(data: EntradaInteligenteRequest, http_client: HTTPClient
         try:
             entrada_res = http_client.request("POST", entrada_url, headers=headers, json=entrada_payload)
         except Exception as e:
-            logger.error(json.dumps({
+            logger.error("%s", _LazyJSON({
                 "event": "entrada_inteligente_error_http",
                 "usuario": data.usuario,
                 "producto": prod.nombre,
@@ -336,7 +338,7 @@ def entrada_inteligente(data: EntradaInteligenteRequest, http_client: HTTPClient
             }), exc_info=True)
             raise
         if entrada_res.status_code not in [200, 201]:
-            logger.error(json.dumps({
+            logger.error("%s", _LazyJSON({
                 "event": "entrada_inteligente_error",
                 "usuario": data.usuario,
                 "producto": prod.nombre,
@@ -345,13 +347,13 @@ def entrada_inteligente(data: EntradaInteligenteRequest, http_client: HTTPClient
             }))
             raise HTTPException(status_code=500, detail=f"No se pudo dar entrada a '{prod.nombre}'")
         procesados.append(prod.nombre)
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "entrada_inteligente_producto_procesado",
             "usuario": data.usuario,
             "producto": prod.nombre,
             "cantidad": prod.cantidad,
         }))
-    logger.info(json.dumps({
+    logger.info("%s", _LazyJSON({
         "event": "entrada_inteligente_fin",
         "usuario": data.usuario,
         "procesados": len(procesados),
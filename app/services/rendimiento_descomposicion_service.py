@@ -17,7 +17,7 @@ from app.utils import normalizar_rango
 from app.logging_config import logger, log_call
 import json
 from app.core.http_sync import get_http_client  # inyección requerida (sin paréntesis)
-from app.clients.rendimiento_descomposicion_client import RendimientoDescomposicionClient
+from app.clients.rendimiento_descomposicion_client import RendimientoDescomposicionClient, get_rendimiento_client
 
 # ==============================================================================
 # FECHAS
@@ -97,10 +97,11 @@ def _resolve_area_or_ask(
             match, candidates = client.find_area_candidates(area_nombre)
         except AttributeError:
             areas = client.list_stock_areas()
+            objetivo = area_nombre.strip().lower()
             match = next(
                 ({"id": a["id"], "name": a["name"]}
                  for a in areas
-                 if (a.get("name") or "").strip().lower() == area_nombre.strip().lower()),
+                 if (a.get("name") or "").strip().lower() == objetivo),
                 None
             )
             candidates = []
@@ -265,7 +266,7 @@ def rendimiento_descomposicion_service(
         raise HTTPException(status_code=403, detail="Usuario no autenticado")
 
     # 2) Cliente Tecopos
-    client = RendimientoDescomposicionClient(
+    client = get_rendimiento_client(
         region=ctx["region"],
         token=ctx["token"],
         business_id=ctx["businessId"],
@@ -16,9 +16,10 @@ from fastapi import HTTPException
 
 from app.core.context import get_user_context
 from app.core.auth import get_base_url, build_auth_headers
-from app.clients.http_client import HTTPClient
-from app.logging_config import logger, log_call
-import json
+from app.clients.http_client import CATALOG_TTL, HTTPClient
+from app.core.http_sync import teco_json
+from app.logging_config import _LazyJSON, logger, log_call
+from app.utils.cache import cache
 from app.schemas.rendimiento import (
     RendimientoHeladoRequest,
     RendimientoYogurtRequest,
@@ -38,7 +39,7 @@ def extraer_sabor(nombre_producto: str) -> str:
 def rendimiento_helado(data: RendimientoHeladoRequest, http_client: HTTPClient) -> Dict[str, Any]:
     ctx = get_user_context(data.usuario)
     if not ctx:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "rendimiento_helado_sin_sesion",
             "usuario": data.usuario,
             "detalle": "Usuario no autenticado",
@@ -48,7 +49,7 @@ def rendimiento_helado(data: RendimientoHeladoRequest, http_client: HTTPClient)
     headers = build_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
     # Log inicio del cálculo de rendimiento de helado
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "rendimiento_helado_inicio",
             "usuario": data.usuario,
             "region": ctx.get("region"),
@@ -61,19 +62,27 @@ def rendimiento_helado(data: RendimientoHeladoRequest, http_client: HTTPClient)
         pass
     # paso 1: obtener área por nombre
     url_areas = f"{base_url}/api/v1/administration/area?page=1&type=STOCK"
-    response_areas = http_client.request("GET", url_areas, headers=headers)
+    response_areas = http_client.get_cached(
+        url_areas, headers=headers, cache_key=("stock_areas", ctx["region"], ctx["businessId"]),
+    )
     if response_areas.status_code != 200:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "rendimiento_helado_error",
             "usuario": data.usuario,
             "detalle": "No se pudieron obtener las áreas",
             "status_code": response_areas.status_code,
         }))
         raise HTTPException(status_code=500, detail="No se pudieron obtener las áreas")
-    areas = response_areas.json().get("items", [])
-    area = next((a for a in areas if a["name"] == data.area_nombre), None)
+    # índice nombre -> área, cacheado junto a la lista (en orden inverso:
+    # con nombres repetidos gana el primero)
+    areas_por_nombre = cache.get_or_set(
+        ("stock_areas_by_name", ctx["region"], ctx["businessId"]),
+        lambda: {a["name"]: a for a in reversed(teco_json(response_areas).get("items", []))},
+        CATALOG_TTL,
+    )
+    area = areas_por_nombre.get(data.area_nombre)
     if not area:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "rendimiento_helado_area_no_encontrada",
             "usuario": data.usuario,
             "area_nombre": data.area_nombre,
@@ -87,22 +96,27 @@ def rendimiento_helado(data: RendimientoHeladoRequest, http_client: HTTPClient)
     )
     response_mov = http_client.request("GET", movimientos_url, headers=headers)
     if response_mov.status_code != 200:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "rendimiento_helado_error_movimientos",
             "usuario": data.usuario,
             "status_code": response_mov.status_code,
             "detalle": "No se pudieron obtener los movimientos",
         }))
         raise HTTPException(status_code=500, detail="No se pudieron obtener los movimientos")
-    movimientos = response_mov.json().get("items", [])
-    entradas = [m for m in movimientos if m["operation"] == "ENTRY"]
-    salidas = [m for m in movimientos if m["operation"] == "OUT"]
+    movimientos = teco_json(response_mov).get("items", [])
+    # una sola pasada: salidas de mezcla + índice parentId -> primera entrada
+    salidas: List[Dict[str, Any]] = []
+    entrada_por_padre: Dict[Any, Dict[str, Any]] = {}
+    for m in movimientos:
+        if m["operation"] == "OUT":
+            if "Mezcla" in m["product"]["name"]:
+                salidas.append(m)
+        elif m["operation"] == "ENTRY" and m.get("parentId") is not None:
+            entrada_por_padre.setdefault(m["parentId"], m)
     resultados: List[Dict[str, Any]] = []
     for salida in salidas:
         nombre_mezcla = salida["product"]["name"]
-        if "Mezcla" not in nombre_mezcla:
-            continue
-        entrada = next((e for e in entradas if e.get("parentId") == salida["id"]), None)
+        entrada = entrada_por_padre.get(salida["id"])
         if not entrada:
             continue
         sabor = extraer_sabor(nombre_mezcla)
@@ -121,7 +135,7 @@ def rendimiento_helado(data: RendimientoHeladoRequest, http_client: HTTPClient)
             "eficiencia_porcentual": eficiencia,
         })
     # Log fin de cálculo
-    logger.info(json.dumps({
+    logger.info("%s", _LazyJSON({
         "event": "rendimiento_helado_fin",
         "usuario": data.usuario,
         "area_id": area["id"],
@@ -138,7 +152,7 @@ def rendimiento_helado(data: RendimientoHeladoRequest, http_client: HTTPClient)
 def rendimiento_yogurt(data: RendimientoYogurtRequest, http_client: HTTPClient) -> RendimientoYogurtResponse:
     ctx = get_user_context(data.usuario)
     if not ctx:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "rendimiento_yogurt_sin_sesion",
             "usuario": data.usuario,
             "detalle": "Usuario no autenticado",
@@ -148,7 +162,7 @@ def rendimiento_yogurt(data: RendimientoYogurtRequest, http_client: HTTPClient)
     headers = build_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
     # Log inicio del cálculo de rendimiento de yogurt
     try:
-        logger.info(json.dumps({
+        logger.info("%s", _LazyJSON({
             "event": "rendimiento_yogurt_inicio",
             "usuario": data.usuario,
             "region": ctx.get("region"),
@@ -161,22 +175,26 @@ def rendimiento_yogurt(data: RendimientoYogurtRequest, http_client: HTTPClient)
         pass
     # obtener ID de área
     areas_url = f"{base_url}/api/v1/administration/area?page=1&type=STOCK"
-    res_areas = http_client.request("GET", areas_url, headers=headers)
+    res_areas = http_client.get_cached(
+        areas_url, headers=headers, cache_key=("stock_areas", ctx["region"], ctx["businessId"]),
+    )
     if res_areas.status_code != 200:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "rendimiento_yogurt_error_areas",
             "usuario": data.usuario,
             "status_code": res_areas.status_code,
             "detalle": "Error consultando áreas",
         }))
         raise HTTPException(status_code=500, detail="Error consultando áreas")
-    area_id = None
-    for area in res_areas.json().get("items", []):
-        if area["name"].strip().lower() == data.area_nombre.strip().lower():
-            area_id = area["id"]
-            break
+    # índice nombre normalizado -> id, cacheado junto a la lista
+    ids_por_nombre = cache.get_or_set(
+        ("stock_area_ids_by_norm_name", ctx["region"], ctx["businessId"]),
+        lambda: {a["name"].strip().lower(): a["id"] for a in reversed(teco_json(res_areas).get("items", []))},
+        CATALOG_TTL,
+    )
+    area_id = ids_por_nombre.get(data.area_nombre.strip().lower())
     if not area_id:
-        logger.warning(json.dumps({
+        logger.warning("%s", _LazyJSON({
             "event": "rendimiento_yogurt_area_no_encontrada",
             "usuario": data.usuario,
             "area_nombre": data.area_nombre,
@@ -189,42 +207,52 @@ def rendimiento_yogurt(data: RendimientoYogurtRequest, http_client: HTTPClient)
     )
     res_movs = http_client.request("GET", movimientos_url, headers=headers)
     if res_movs.status_code != 200:
-        logger.error(json.dumps({
+        logger.error("%s", _LazyJSON({
             "event": "rendimiento_yogurt_error_movimientos",
             "usuario": data.usuario,
             "status_code": res_movs.status_code,
             "detalle": "Error consultando movimientos",
         }))
         raise HTTPException(status_code=500, detail="Error consultando movimientos")
-    movimientos = res_movs.json().get("items", [])
-    producciones: List[RendimientoYogurtResumen] = []
+    movimientos = teco_json(res_movs).get("items", [])
+    # una sola pasada: salidas + índice parentId -> entradas (en el orden
+    # original) para no recorrer todos los movimientos por cada salida
+    salidas: List[Dict[str, Any]] = []
+    entradas_por_padre: Dict[Any, List[Dict[str, Any]]] = {}
     for mov in movimientos:
-        if mov["operation"] == "OUT":
-            mezcla_id = mov["id"]
-            mezcla_qty = abs(mov["quantity"])
-            for entrada in movimientos:
-                if entrada["operation"] == "ENTRY" and entrada.get("parentId") == mezcla_id:
-                    producto_final = entrada["product"]["name"]
-                    qty_final = entrada["quantity"]
-                    rendimiento_real = qty_final / mezcla_qty if mezcla_qty else 0
-                    rendimiento_ideal = 1.0
-                    eficiencia = round((rendimiento_real / rendimiento_ideal) * 100, 2) if rendimiento_ideal else 0
-                    producciones.append(
-                        RendimientoYogurtResumen(
-                            tipo="Yogurt",
-                            sabor=producto_final.replace("Yogurt", "").strip(),
-                            mezcla_usada_litros=mezcla_qty,
-                            producto_producido_litros=qty_final,
-                            rendimiento_real=round(rendimiento_real, 4),
-                            rendimiento_ideal=rendimiento_ideal,
-                            eficiencia_porcentual=eficiencia,
-                        )
-                    )
+        operacion = mov["operation"]
+        if operacion == "OUT":
+            salidas.append(mov)
+        elif operacion == "ENTRY" and mov.get("parentId") is not None:
+            entradas_por_padre.setdefault(mov["parentId"], []).append(mov)
+    producciones: List[RendimientoYogurtResumen] = []
+    for mov in salidas:
+        mezcla_id = mov["id"]
+        mezcla_qty = abs(mov["quantity"])
+        for entrada in entradas_por_padre.get(mezcla_id, ()):
+            producto_final = entrada["product"]["name"]
+            qty_final = entrada["quantity"]
+            rendimiento_real = qty_final / mezcla_qty if mezcla_qty else 0
+            rendimiento_ideal = 1.0
+            eficiencia = round((rendimiento_real / rendimiento_ideal) * 100, 2) if rendimiento_ideal else 0
+            # Datos calculados aquí a partir de la respuesta de Tecopos:
+            # se construyen sin revalidar cada campo.
+            producciones.append(
+                RendimientoYogurtResumen.model_construct(
+                    tipo="Yogurt",
+                    sabor=producto_final.replace("Yogurt", "").strip(),
+                    mezcla_usada_litros=mezcla_qty,
+                    producto_producido_litros=qty_final,
+                    rendimiento_real=round(rendimiento_real, 4),
+                    rendimiento_ideal=rendimiento_ideal,
+                    eficiencia_porcentual=eficiencia,
+                )
+            )
     # Log fin del cálculo
-    logger.info(json.dumps({
+    logger.info("%s", _LazyJSON({
         "event": "rendimiento_yogurt_fin",
         "usuario": data.usuario,
         "area_id": area_id,
         "num_registros": len(producciones),
     }))
-    return RendimientoYogurtResponse(area_nombre=data.area_nombre, area_id=area_id, resumen=producciones)
+    return RendimientoYogurtResponse.model_construct(area_nombre=data.area_nombre, area_id=area_id, resumen=producciones)
@@ -19,6 +19,7 @@ from fastapi import HTTPException
 from app.core.context import get_user_context
 from app.core.auth import get_base_url, build_auth_headers
 from app.clients.http_client import HTTPClient
+from app.core.http_sync import teco_batch, teco_json
 from app.logging_config import logger, log_call
 import json
 from app.schemas.reports import (
@@ -57,7 +58,7 @@ def reporte_ventas(data: ReporteVentasRequest, http_client: HTTPClient) -> Dict[
     res = http_client.request("GET", url, headers=headers, params=params)
     if res.status_code != 200:
         raise HTTPException(status_code=500, detail="No se pudo obtener el reporte de ventas")
-    productos = res.json().get("products", [])
+    productos = teco_json(res).get("products", [])
     resumen: List[Dict[str, Any]] = []
     for p in productos:
         for venta in p.get("totalSales", []):
@@ -213,7 +214,7 @@ def analisis_desempeno(data: AnalisisDesempenoRequest, http_client: HTTPClient)
     res = http_client.request("GET", url, headers=headers, params=params)
     if res.status_code != 200:
         raise HTTPException(status_code=500, detail="No se pudo obtener el reporte de ventas")
-    productos_raw = res.json().get("products", [])
+    productos_raw = teco_json(res).get("products", [])
     productos: List[Dict[str, Any]] = []
     for p in productos_raw:
         for venta in p.get("totalSales", []):
@@ -327,7 +328,7 @@ def enriquecer_proyeccion_con_nombres(usuario: str, proyeccion: List[Dict[str, A
     while True:
         url = f"{base_url}/api/v1/administration/product?page={pagina}"
         resp = http_client.request("GET", url, headers=headers)
-        productos = resp.json().get("items", [])
+        productos = teco_json(resp).get("items", [])
         if not productos:
             break
         for p in productos:
@@ -358,20 +359,26 @@ def ventas_diarias(data: Dict[str, Any], http_client: HTTPClient) -> Dict[str, A
         raise HTTPException(status_code=400, detail="fecha_inicio debe ser menor o igual que fecha_fin")
     resultados: List[Dict[str, Any]] = []
     dias = (fecha_fin - fecha_inicio).days + 1
-    for i in range(dias):
-        dia = fecha_inicio + timedelta(days=i)
+    fechas = [fecha_inicio + timedelta(days=i) for i in range(dias)]
+    calls = []
+    for dia in fechas:
         inicio_dia = datetime.combine(dia.date(), time(0, 1))
         fin_dia = datetime.combine(dia.date(), time(23, 59))
         date_from = inicio_dia.strftime("%Y-%m-%d %H:%M")
         date_to = fin_dia.strftime("%Y-%m-%d %H:%M")
         url = f"{base_url}/api/v1/report/selled-products?dateFrom={date_from}&dateTo={date_to}&status=BILLED"
+        calls.append({"method": "GET", "url": url, "headers": headers})
+    # un día por petición, en paralelo; los resultados llegan en orden
+    respuestas = teco_batch(calls, send=http_client.request, return_exceptions=True)
+    for dia, res in zip(fechas, respuestas):
         try:
-            res = http_client.request("GET", url, headers=headers)
+            if isinstance(res, Exception):
+                raise res
             if res.status_code != 200:
                 raise Exception(f"Error HTTP {res.status_code}: {res.text}")
             resultados.append({
                 "fecha": dia.strftime("%Y-%m-%d"),
-                "productos": res.json().get("products", []),
+                "productos": teco_json(res).get("products", []),
             })
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error consultando el día {dia.strftime('%Y-%m-%d')}: {str(e)}")
@@ -471,7 +478,7 @@ def reporte_ventas_global(data: ReporteGlobalRequest, http_client: HTTPClient) -
     resp = http_client.request("GET", url, headers=headers, params=params, timeout=30)
     if resp.status_code != 200:
         raise HTTPException(status_code=500, detail=f"Error al obtener ventas globales ({resp.status_code}): {resp.text}")
-    raw = resp.json()
+    raw = teco_json(resp)
     detalles: List[Dict[str, Any]] = []
     total_sales = 0.0
     total_cost = 0.0
@@ -561,7 +568,7 @@ def ticket_promedio(data: RangoFechasConHora, http_client: HTTPClient) -> Dict[s
     response = http_client.request("GET", url, headers=headers, params=params)
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Error al obtener órdenes")
-    response_data = response.json()
+    response_data = teco_json(response)
     ordenes = response_data.get("orders", [])
     if not isinstance(ordenes, list):
         raise HTTPException(status_code=500, detail="Respuesta inesperada de Tecopos")
@@ -164,7 +164,7 @@ def obtener_o_crear_categoria(nombre_categoria: str, base_url: str, headers: Dic
     existente = next((c for c in categorias if normalizar(c.get("name", "")) == normalizar(nombre_categoria)), None)
     if existente:
         return existente["id"]
-    crear_res = teco_request("POST", cat_url, headers=headers, json={"name": nombre_categoria})
+    crear_res = teco_request("POST", cat_url, headers=headers, json_body={"name": nombre_categoria})
     if crear_res.status_code not in [200, 201]:
         raise HTTPException(status_code=500, detail="No se pudo crear la categoría")
     # Re-fetch categories to obtain the new id
@@ -273,7 +273,7 @@ def crear_o_buscar_producto(producto: "ProductoEntradaInteligente", base_url: st
         "images": [],
         "salesCategoryId": categoria_id,
     }
-    crear_res = teco_request("POST", crear_url, headers=headers, json=crear_payload)
+    crear_res = teco_request("POST", crear_url, headers=headers, json_body=crear_payload)
     if crear_res.status_code not in [200, 201]:
         raise HTTPException(status_code=500, detail=f"No se pudo crear '{producto.nombre}'")
     return crear_res.json().get("id")
@@ -349,7 +349,7 @@ def crear_categoria_si_no_existe(ctx: Dict[str, object], nombre_categoria: str)
     """Ensure a sales category exists for the current business and return its id."""
     url = f"{get_base_url(ctx['region'])}/api/v1/administration/salescategory"
     headers = get_auth_headers(ctx["token"], ctx["businessId"], ctx["region"])
-    r = teco_request("POST", url, headers=headers, json={"name": nombre_categoria})
+    r = teco_request("POST", url, headers=headers, json_body={"name": nombre_categoria})
     if r.status_code == 200:
         return r.json()["id"]
     elif r.status_code == 409:
@@ -373,7 +373,7 @@ def crear_producto(ctx: Dict[str, object], producto: "ProductoCarga", categoria_
         "barcode": producto.barcode,
         "categoryId": categoria_id,
     }
-    r = teco_request("POST", url, headers=headers, json=payload)
+    r = teco_request("POST", url, headers=headers, json_body=payload)
     if r.status_code != 200:
         raise HTTPException(status_code=r.status_code, detail=r.text)
     return r.json()["id"]
@@ -388,8 +388,9 @@ def buscar_producto_por_nombre(ctx: Dict[str, object], nombre: str) -> Optional[
     if r.status_code == 200:
         data = r.json()
         productos = data.get("items", []) if isinstance(data, dict) else []
+        objetivo = nombre.strip().lower()
         for p in productos:
-            if isinstance(p, dict) and p.get("name", "").strip().lower() == nombre.strip().lower():
+            if isinstance(p, dict) and p.get("name", "").strip().lower() == objetivo:
                 return p
     return None
 
@@ -414,7 +415,7 @@ def registrar_producto_en_carga(ctx: Dict[str, object], carga_id: int, product_i
         "registeredPrice": {"amount": amount, "codeCurrency": code_currency},
         "uniqueCode": lote,
     }
-    response = teco_request("POST", url, headers=headers, json=payload)
+    response = teco_request("POST", url, headers=headers, json_body=payload)
     if response.status_code not in [200, 201]:
         raise Exception(
             f"Error al registrar '{getattr(prod, 'name', 'Desconocido')}': "
@@ -5,29 +5,40 @@ utils/cache.py
 Simple in‑process cache with TTL support. This cache is used to
 store relatively static API responses such as price system lists or
 sales categories. Each entry is stored with an expiry timestamp and
-is automatically evicted upon retrieval if expired. The cache is
-designed for a single process and is not thread‑safe; however,
-FastAPI’s default worker model spawns independent processes so race
-conditions are not a concern.
+is automatically evicted upon retrieval if expired, and expired
+entries are also swept periodically on insert. An optional
+``maxsize`` bounds the number of entries so long‑running workers do
+not grow without limit. The cache is designed for a single process;
+a lock guards the store because sync handlers run on a thread pool.
 """
 
 from __future__ import annotations
 
+import threading
 import time
-from typing import Any, Dict, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 
 class TTLCache:
     """In‑memory cache with time to live (TTL).
 
     Values are stored with an expiration timestamp. When retrieving
-    values, expired entries are pruned. The cache does not enforce
-    maximum size; it is cleared only upon expiry or explicit calls
-    to :meth:`clear`.
+    values, expired entries are pruned; every ``_SWEEP_INTERVAL`` inserts
+    all expired entries are dropped, so dead entries do not pile up until
+    ``maxsize``. If ``maxsize`` is given, adding an entry beyond it first
+    drops expired entries and then the oldest ones.
     """
 
-    def __init__(self) -> None:
+    # inserts between full sweeps of expired entries
+    _SWEEP_INTERVAL = 128
+
+    def __init__(self, maxsize: Optional[int] = None) -> None:
         self._store: Dict[Any, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        # per-key lock + number of threads holding or waiting on it
+        self._key_locks: Dict[Any, List[Any]] = {}
+        self.maxsize = maxsize
+        self._sets_since_sweep = 0
 
     def set(self, key: Any, value: Any, ttl: float) -> None:
         """Store a value in the cache for a given number of seconds.
@@ -36,7 +47,26 @@ class TTLCache:
         :param value: value to cache
         :param ttl: time to live in seconds
         """
-        self._store[key] = (time.time() + ttl, value)
+        with self._lock:
+            now = time.time()
+            self._store.pop(key, None)
+            self._store[key] = (now + ttl, value)
+            self._sets_since_sweep += 1
+            if self._sets_since_sweep >= self._SWEEP_INTERVAL:
+                self._purge_expired(now)
+            if self.maxsize is not None and len(self._store) > self.maxsize:
+                self._evict(now)
+
+    def _purge_expired(self, now: float) -> None:
+        for k in [k for k, (expires_at, _) in self._store.items() if expires_at <= now]:
+            del self._store[k]
+        self._sets_since_sweep = 0
+
+    def _evict(self, now: float) -> None:
+        self._purge_expired(now)
+        # insertion order == age: drop the oldest until within bounds
+        while len(self._store) > self.maxsize:  # type: ignore[operator]
+            del self._store[next(iter(self._store))]
 
     def get(self, key: Any) -> Any:
         """Retrieve a value from the cache.
@@ -53,14 +83,65 @@ class TTLCache:
         expires_at, value = entry
         if time.time() >= expires_at:
             # expire the entry
-            self._store.pop(key, None)
+            with self._lock:
+                self._store.pop(key, None)
             return None
         return value
 
+    def get_or_set(
+        self,
+        key: Any,
+        factory: Callable[[], Any],
+        ttl: float,
+        *,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Return the cached value for ``key`` or compute it with ``factory``.
+
+        Concurrent misses on the same key are collapsed: one thread runs
+        ``factory`` while the others wait for its result (no stampede).
+        ``None`` results, or those rejected by ``cache_if``, are returned
+        but not stored.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                value = self.get(key)
+                if value is None:
+                    value = factory()
+                    if value is not None and (cache_if is None or cache_if(value)):
+                        self.set(key, value, ttl)
+        finally:
+            # the lock is dropped only once nobody holds or waits on it, so a
+            # late arrival cannot start a second factory run in parallel, and
+            # a raising factory does not leave its lock behind
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+        return value
+
+    def delete(self, key: Any) -> None:
+        """Remove a single entry if present."""
+        with self._lock:
+            self._store.pop(key, None)
+
+    def delete_matching(self, predicate: Callable[[Any], bool]) -> None:
+        """Remove every entry whose key satisfies ``predicate``."""
+        with self._lock:
+            for k in [k for k in self._store if predicate(k)]:
+                del self._store[k]
+
     def clear(self) -> None:
         """Clear all entries from the cache."""
-        self._store.clear()
+        with self._lock:
+            self._store.clear()
 
 
 # global cache instance
-cache = TTLCache()
\ No newline at end of file
+cache = TTLCache(maxsize=1024)
\ No newline at end of file